@@ -0,0 +1,140 @@
+"""
+Плановая проверка алертов: прежний check_all (get_latest_by_stock на каждый алерт,
+UPDATE на каждый сработавший) против набора запросов нынешнего check_all
+(последняя цена один раз на акцию, сработавшие одним JOIN, один UPDATE ... RETURNING).
+Отправка push в замер не входит.
+
+Нужен PostgreSQL из настроек приложения; всё пишется во временную схему.
+
+    python -m bench.alert_check [--alerts 100000] [--stocks 300] [--hit-pct 1]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, text
+
+from bench.db import scratch_session_maker, seed_prices, seed_stocks
+from src.modules.notify.models import Alert
+from src.modules.notify.repository import AlertRepository
+from src.modules.notify.schemas import AlertUpdate
+from src.modules.stock_prices.cache import quote_cache
+from src.modules.stock_prices.models import StockPrice
+from src.modules.stock_prices.repository import StockPriceRepository
+from src.modules.stocks.models import Stock
+from src.modules.users.models import User
+
+
+SEED_USERS_SQL = """
+    INSERT INTO users (email, nickname, hashed_password, created_at)
+    SELECT 'u' || g || '@bench', 'u' || g, '-', now() FROM generate_series(1, :count) AS g
+"""
+# Пороги вокруг последней цены: срабатывает примерно :hit_pct процентов алертов
+SEED_ALERTS_SQL = """
+    WITH latest AS (
+        SELECT DISTINCT ON (stock_id) stock_id, close FROM stock_prices ORDER BY stock_id, date DESC
+    ), s AS (
+        SELECT stock_id, close, row_number() OVER (ORDER BY stock_id) - 1 AS n, count(*) OVER () AS total
+        FROM latest
+    ), u AS (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS n, count(*) OVER () AS total FROM users
+    )
+    INSERT INTO alerts (user_id, stock_id, condition, value, is_active, created_at)
+    SELECT u.id, s.stock_id, side.condition,
+           s.close * (1 + side.sign * (random() * 100 - :hit_pct) / 100), true, now()
+    FROM generate_series(0, :count - 1) AS g
+    JOIN s ON s.n = g % s.total
+    JOIN u ON u.n = (g / s.total) % u.total
+    CROSS JOIN LATERAL (
+        SELECT CASE WHEN g % 2 = 0 THEN 'above' ELSE 'below' END AS condition,
+               CASE WHEN g % 2 = 0 THEN 1 ELSE -1 END AS sign
+    ) AS side
+"""
+RESET_ALERTS_SQL = "UPDATE alerts SET is_active = true, triggered_at = NULL WHERE NOT is_active"
+
+
+async def per_alert(session) -> int:
+    # Прежний AlertService.check_all без отправки push
+    repo = AlertRepository(session)
+    price_repo = StockPriceRepository(session)
+    triggered = 0
+
+    for alert in await repo.get_all_active():
+        latest = await price_repo.get_latest_by_stock(alert.stock_id)
+        if not latest:
+            continue
+
+        is_triggered = (
+            (alert.condition == "above" and latest.close >= alert.value) or
+            (alert.condition == "below" and latest.close <= alert.value)
+        )
+        if not is_triggered:
+            continue
+
+        await repo.edit(AlertUpdate(is_active=False, triggered_at=latest.date), id=alert.id)
+        await session.commit()
+        triggered += 1
+
+    return triggered
+
+
+async def set_based(session) -> int:
+    # Нынешний AlertService.check_all до _deliver; refresh — всегда из БД, без попаданий в кэш
+    repo = AlertRepository(session)
+    stock_ids = await repo.get_active_stock_ids()
+    quotes = await quote_cache.refresh(StockPriceRepository(session), stock_ids)
+    triggered = await repo.get_triggered({sid: q.latest for sid, q in quotes.items()})
+    claimed = await repo.claim(list({a.alert_id: a.date for a in triggered}.items()))
+    await session.commit()
+    return len(claimed)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--stocks", type=int, default=300)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--hit-pct", type=float, default=1.0, help="доля сработавших алертов, %%")
+    args = parser.parse_args()
+
+    tables = (User.__table__, Stock.__table__, StockPrice.__table__, Alert.__table__)
+    async with scratch_session_maker(tables) as session_maker:
+        stock_ids = await seed_stocks(session_maker, args.stocks)
+        await seed_prices(session_maker, stock_ids, 50)
+        async with session_maker() as session:
+            await session.execute(text(SEED_USERS_SQL), {"count": args.users})
+            await session.execute(text(SEED_ALERTS_SQL), {"count": args.alerts, "hit_pct": args.hit_pct})
+            await session.commit()
+            await session.execute(text("ANALYZE"))
+            await session.commit()
+
+        queries = 0
+
+        def count_query(*_):
+            nonlocal queries
+            queries += 1
+
+        event.listen(session_maker.kw["bind"].sync_engine, "before_cursor_execute", count_query)
+
+        results = {}
+        for name, fn in (("на каждый алерт", per_alert), ("одним набором", set_based)):
+            async with session_maker() as session:
+                await session.execute(text(RESET_ALERTS_SQL))
+                await session.commit()
+
+            queries = 0
+            async with session_maker() as session:
+                started = time.perf_counter()
+                triggered = await fn(session)
+                elapsed = time.perf_counter() - started
+
+            results[name] = elapsed
+            print(f"{name:>16}: {elapsed * 1000:10.1f} ms, запросов {queries:>7}, "
+                  f"сработало {triggered} из {args.alerts} алертов")
+
+        per_row, batched = results.values()
+        print(f"[✓] Ускорение: x{per_row / batched:.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Проверка алертов на одну новую цену: AlertIndex.match (бинарный поиск по порогам акции)
+против просмотра всех активных алертов — по мере роста числа алертов.
+
+    python -m bench.alert_index [--sizes 10000 100000 1000000] [--stocks 300] [--quotes 2000]
+"""
+import argparse
+import random
+import time
+
+import bench.offline  # noqa: F401  — до импорта src
+from src.modules.notify.index import AlertIndex, IndexedAlert
+
+
+def make_alerts(count: int, stocks: int, rnd: random.Random) -> list[IndexedAlert]:
+    return [
+        IndexedAlert(
+            alert_id=i,
+            user_id=i % 5000,
+            stock_id=i % stocks,
+            condition="above" if i % 2 else "below",
+            # "above" ставят выше текущей цены (~100), "below" — ниже
+            value=round(rnd.uniform(100, 150) if i % 2 else rnd.uniform(50, 100), 2),
+        )
+        for i in range(count)
+    ]
+
+
+def linear_match(alerts: list[IndexedAlert], stock_id: int, close: float) -> list[IndexedAlert]:
+    return [
+        a for a in alerts
+        if a.stock_id == stock_id and (
+            (a.condition == "above" and close >= a.value) or
+            (a.condition == "below" and close <= a.value)
+        )
+    ]
+
+
+def per_quote(fn, quotes: list[tuple[int, float]]) -> tuple[float, int]:
+    """Среднее время на котировку и общее число сработавших."""
+    matched = 0
+    started = time.perf_counter()
+    for stock_id, close in quotes:
+        matched += len(fn(stock_id, close))
+    return (time.perf_counter() - started) / len(quotes), matched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--stocks", type=int, default=300)
+    parser.add_argument("--quotes", type=int, default=2000, help="котировок на замер (у скана — не больше 200)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    # Цена колеблется около 100: срабатывают только ближайшие к ней пороги
+    quotes = [(rnd.randrange(args.stocks), rnd.gauss(100, 3)) for _ in range(args.quotes)]
+
+    for size in args.sizes:
+        alerts = make_alerts(size, args.stocks, rnd)
+
+        index = AlertIndex()
+        started = time.perf_counter()
+        index.rebuild(alerts)
+        rebuild = time.perf_counter() - started
+
+        indexed, matched = per_quote(index.match, quotes)
+        # Скан дорогой — ему хватает меньшей выборки котировок
+        scan_quotes = quotes[:200]
+        scanned, _ = per_quote(lambda s, c: linear_match(alerts, s, c), scan_quotes)
+        indexed_same, _ = per_quote(index.match, scan_quotes)
+        for stock_id, close in scan_quotes[:20]:
+            assert sorted(a.alert_id for a in index.match(stock_id, close)) == \
+                [a.alert_id for a in linear_match(alerts, stock_id, close)]
+
+        print(f"{size:>10,} алертов: индекс {indexed * 1e6:8.1f} µs/котировка "
+              f"(сработало в среднем {matched / len(quotes):.0f}), скан {scanned * 1e6:10.1f} µs/котировка "
+              f"(x{scanned / indexed_same:.0f}), перестроение индекса {rebuild * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Накладные расходы авторизации на запрос: прежняя зависимость get_current_user_id
+(сессия БД + AuthService с новым CryptContext + jwt.decode) против нынешней
+(token_verifier: LRU по подписи, без сессии). Запросы идут через ASGI без сети,
+накладные расходы — разница с тем же маршрутом без авторизации.
+
+Соединение из пула прежний путь брал бы только при первом запросе в сессии,
+здесь БД нет — поэтому его оценка занижена.
+
+    python -m bench.auth_overhead [--requests 5000]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Annotated
+
+import bench.offline  # noqa: F401  — до импорта src
+import httpx
+import jwt
+from fastapi import Depends, FastAPI, Header, HTTPException
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.database import get_async_session
+from src.core.dependencies import UserIdDep
+from src.modules.auth.tokens import token_verifier
+
+
+async def old_current_user_id(
+    authorization: Annotated[str | None, Header()] = None,
+    session: AsyncSession = Depends(get_async_session),
+) -> int:
+    # Прежний get_current_user_id: AuthService(session) строил CryptContext на каждый запрос
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="Invalid Authorization header")
+
+    CryptContext(schemes=["bcrypt"], deprecated="auto")
+    try:
+        payload = jwt.decode(token, key=settings.JWT_SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Невалидный токен")
+
+    return payload["user_id"]
+
+
+app = FastAPI()
+
+
+@app.get("/none")
+async def no_auth():
+    return {"user_id": 0}
+
+
+@app.get("/old")
+async def old_auth(user_id: int = Depends(old_current_user_id)):
+    return {"user_id": user_id}
+
+
+@app.get("/new")
+async def new_auth(user_id: UserIdDep):
+    return {"user_id": user_id}
+
+
+def make_token(user_id: int) -> str:
+    expire = datetime.now(timezone.utc) + timedelta(minutes=30)
+    return jwt.encode({"user_id": user_id, "exp": expire}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+async def run(client: httpx.AsyncClient, path: str, tokens: list[str]) -> list[float]:
+    timings = []
+    for token in tokens:
+        started = time.perf_counter()
+        response = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+    return sorted(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200, help="разных токенов в прогоне с повторами")
+    args = parser.parse_args()
+
+    # Типичный поток: одни и те же пользователи повторяют запросы со своим токеном
+    user_tokens = [make_token(i) for i in range(args.users)]
+    repeated = [user_tokens[i % args.users] for i in range(args.requests)]
+    # Худший случай для кэша: каждый запрос с новым токеном
+    unique = [make_token(args.users + i) for i in range(args.requests)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await run(client, "/none", repeated[:200])  # прогрев
+        floor = await run(client, "/none", repeated)
+        scenarios = (
+            ("прежняя зависимость", "/old", repeated),
+            ("token_verifier, новые", "/new", unique),
+            ("token_verifier, повторы", "/new", repeated),
+        )
+        base = sum(floor) / len(floor)
+        print(f"{'без авторизации':>24}: {base * 1e6:8.1f} µs/запрос")
+        for name, path, tokens in scenarios:
+            timings = await run(client, path, tokens)
+            mean = sum(timings) / len(timings)
+            p99 = timings[int(len(timings) * 0.99)]
+            print(f"{name:>24}: {mean * 1e6:8.1f} µs/запрос, p99 {p99 * 1e6:8.1f} µs, "
+                  f"накладные расходы {(mean - base) * 1e6:7.1f} µs")
+
+    print(f"[i] token_verifier: {token_verifier.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Запись свечей в stock_prices: прежний цикл (SELECT на каждую свечу + session.add)
+против bulk_upsert_batch (INSERT ... SELECT FROM unnest ... ON CONFLICT).
+
+Нужен PostgreSQL из настроек приложения; всё пишется во временную схему.
+
+    python -m bench.bulk_upsert [--rows 5000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import math
+import time
+
+from sqlalchemy import select, text
+
+from bench.db import scratch_session_maker, seed_stocks
+from bench.make_fixtures import FIXTURES, load
+from src.modules.stock_prices.models import StockPrice
+from src.modules.stock_prices.parsing import CandleBatch, parse_candles_page, to_datetime
+from src.modules.stock_prices.repository import StockPriceRepository
+
+
+async def upsert_loop(session, prices: list[StockPrice]) -> int:
+    # Прежний StockPriceRepository.bulk_upsert_prices
+    added = 0
+    for p in prices:
+        stmt = select(StockPrice).filter_by(stock_id=p.stock_id, date=p.date)
+        result = await session.execute(stmt)
+        existing = result.scalars().first()
+
+        if not existing:
+            session.add(p)
+            added += 1
+
+    return added
+
+
+def as_orm(stock_id: int, batch: CandleBatch) -> list[StockPrice]:
+    return [
+        StockPrice(
+            stock_id=stock_id,
+            date=to_datetime(batch.timestamps[i]),
+            open=batch.open[i],
+            high=batch.high[i],
+            low=batch.low[i],
+            close=batch.close[i],
+            volume=None if math.isnan(batch.volume[i]) else batch.volume[i],
+            value=None if math.isnan(batch.value[i]) else batch.value[i],
+        )
+        for i in range(len(batch))
+    ]
+
+
+async def run_loop(session_maker, stock_id: int, batch: CandleBatch) -> tuple[float, int]:
+    # ORM-объекты одноразовые: после add они привязаны к сессии
+    prices = as_orm(stock_id, batch)
+    async with session_maker() as session:
+        started = time.perf_counter()
+        added = await upsert_loop(session, prices)
+        await session.commit()
+        return time.perf_counter() - started, added
+
+
+async def run_batch(session_maker, stock_id: int, batch: CandleBatch) -> tuple[float, int]:
+    async with session_maker() as session:
+        started = time.perf_counter()
+        added = await StockPriceRepository(session).bulk_upsert_batch(stock_id, batch)
+        await session.commit()
+        return time.perf_counter() - started, added
+
+
+async def truncate(session_maker) -> None:
+    async with session_maker() as session:
+        await session.execute(text("TRUNCATE stock_prices"))
+        await session.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default=str(FIXTURES / "iss_candles_1h.json.gz"))
+    parser.add_argument("--rows", type=int, default=5000, help="свечей в пачке (как у backfill одной бумаги)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    batch = parse_candles_page(load(args.file))
+    batch = batch.slice(0, args.rows)
+    rows = len(batch)
+
+    async with scratch_session_maker() as session_maker:
+        [stock_id] = await seed_stocks(session_maker, 1)
+        results = {}
+
+        for name, run in (("SELECT на свечу", run_loop), ("bulk_upsert_batch", run_batch)):
+            fresh, repeated = [], []
+            for _ in range(args.repeat):
+                await truncate(session_maker)
+                elapsed, added = await run(session_maker, stock_id, batch)
+                assert added == rows, f"{name}: вставлено {added} из {rows}"
+                fresh.append(elapsed)
+                # Повторный прогон той же пачки: все свечи уже есть
+                elapsed, added = await run(session_maker, stock_id, batch)
+                assert added == 0, f"{name}: повторно вставлено {added}"
+                repeated.append(elapsed)
+
+            print(f"{name:>18}: новые {rows / min(fresh):>10,.0f} строк/с ({min(fresh) * 1000:8.1f} ms), "
+                  f"повтор {rows / min(repeated):>10,.0f} строк/с ({min(repeated) * 1000:8.1f} ms)")
+            results[name] = min(fresh)
+
+        loop, batched = results.values()
+        print(f"[✓] Ускорение на новых свечах: x{loop / batched:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
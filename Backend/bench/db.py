@@ -0,0 +1,84 @@
+"""
+Временная схема PostgreSQL для бенчмарков с БД.
+
+Подключение берётся из настроек приложения (.env / окружение), таблицы
+создаются в отдельной схеме bench_<pid> и удаляются вместе с ней после прогона —
+рабочие данные не затрагиваются. Триграммным индексам stocks нужно расширение
+pg_trgm в public (его ставит старт приложения).
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.core.config import settings
+from src.core.database import Base
+from src.modules.stocks.models import Stock
+from src.modules.stock_prices.models import StockPrice
+
+
+SEED_START = datetime(2015, 1, 5)
+
+SEED_STOCKS_SQL = """
+    INSERT INTO stocks (symbol, shortname, board)
+    SELECT 'B' || g, 'Bench ' || g, 'TQBR' FROM generate_series(1, :count) AS g
+"""
+# Часовые свечи подряд от SEED_START: для запросов "последние N" и бакетирования
+# важны только объём и порядок дат, а не торговое расписание
+SEED_PRICES_SQL = """
+    INSERT INTO stock_prices (stock_id, date, open, high, low, close, volume, value)
+    SELECT s.id, CAST(:start AS TIMESTAMP) + make_interval(hours => g),
+           p, p + 1, p - 1, p + 0.5, 1000, 1000 * p
+    FROM stocks AS s
+    CROSS JOIN generate_series(:offset, :offset + :per_stock - 1) AS g
+    CROSS JOIN LATERAL (SELECT 100 + 10 * sin(g / 50.0) AS p) AS price
+    WHERE s.id = ANY(:stock_ids)
+"""
+
+
+@asynccontextmanager
+async def scratch_session_maker(tables=(Stock.__table__, StockPrice.__table__)):
+    schema = f"bench_{os.getpid()}"
+    engine = create_async_engine(
+        settings.DB_URL,
+        connect_args={"server_settings": {"search_path": f"{schema}, public"}},
+    )
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+        await conn.run_sync(Base.metadata.create_all, tables=list(tables))
+    print(f"[i] Временная схема {schema} на {settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
+
+    try:
+        yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await engine.dispose()
+        print(f"[i] Схема {schema} удалена")
+
+
+async def seed_stocks(session_maker: async_sessionmaker, count: int) -> list[int]:
+    async with session_maker() as session:
+        await session.execute(text(SEED_STOCKS_SQL), {"count": count})
+        ids = (await session.execute(text("SELECT id FROM stocks ORDER BY id"))).scalars().all()
+        await session.commit()
+    return list(ids)
+
+
+async def seed_prices(session_maker: async_sessionmaker, stock_ids: list[int], per_stock: int, offset: int = 0) -> None:
+    # offset — сдвиг в часах от SEED_START: дозаливка продолжает историю, а не дублирует её
+    started = time.perf_counter()
+    async with session_maker() as session:
+        await session.execute(
+            text(SEED_PRICES_SQL),
+            {"start": SEED_START, "offset": offset, "per_stock": per_stock, "stock_ids": stock_ids},
+        )
+        await session.commit()
+    # Статистика для планировщика, иначе первые замеры идут по устаревшим оценкам
+    async with session_maker() as session:
+        await session.execute(text("ANALYZE stock_prices"))
+        await session.commit()
+    print(f"[i] +{len(stock_ids) * per_stock:,} свечей ({time.perf_counter() - started:.1f}s)")
@@ -0,0 +1,85 @@
+"""
+График /prices/history по часовым свечам: прежняя группировка в Python
+(все строки периода через ORM + _aggregate) против get_bucketed_history (ntile в PostgreSQL).
+
+Нужен PostgreSQL из настроек приложения; всё пишется во временную схему.
+
+    python -m bench.history [--candles 45000] [--count 100] [--repeat 5]
+"""
+import argparse
+import asyncio
+import gc
+import statistics
+import time
+import tracemalloc
+
+from bench.db import scratch_session_maker, seed_prices, seed_stocks
+from src.modules.stock_prices.repository import StockPriceRepository
+from src.modules.stock_prices.service import HOURS_PER_TRADING_DAY, StockPriceService
+
+
+PERIODS = ((30, "30d"), (180, "180d"), (0, "вся история"))
+
+
+def history_limit(days: int) -> int | None:
+    return None if days == 0 else int(days * 5 / 7) * HOURS_PER_TRADING_DAY
+
+
+async def python_grouping(repo: StockPriceRepository, stock_id: int, days: int, count: int):
+    raw = await repo.get_prices_by_stock(stock_id, limit=history_limit(days))
+    return StockPriceService._aggregate(stock_id, raw, count)
+
+
+async def sql_bucketing(repo: StockPriceRepository, stock_id: int, days: int, count: int):
+    return await repo.get_bucketed_history(stock_id, count, limit=history_limit(days))
+
+
+async def measure(session_maker, fn, stock_id: int, days: int, count: int, repeat: int):
+    """Медиана времени по ``repeat`` прогонам, число точек и пик памяти Python (отдельным прогоном)."""
+    timings = []
+    for _ in range(repeat):
+        # Новая сессия на прогон: identity map не должна копить строки между замерами
+        async with session_maker() as session:
+            repo = StockPriceRepository(session)
+            gc.collect()
+            started = time.perf_counter()
+            points = await fn(repo, stock_id, days, count)
+            timings.append(time.perf_counter() - started)
+
+    async with session_maker() as session:
+        repo = StockPriceRepository(session)
+        gc.collect()
+        tracemalloc.start()
+        await fn(repo, stock_id, days, count)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return statistics.median(timings), len(points), peak
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candles", type=int, default=45000, help="часовых свечей у бумаги (~10 лет)")
+    parser.add_argument("--count", type=int, default=100, help="точек на графике, как у /prices/history")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    async with scratch_session_maker() as session_maker:
+        [stock_id] = await seed_stocks(session_maker, 1)
+        await seed_prices(session_maker, [stock_id], args.candles)
+
+        for days, label in PERIODS:
+            rows = history_limit(days) or args.candles
+            results = {}
+            for name, fn in (("Python", python_grouping), ("SQL ntile", sql_bucketing)):
+                elapsed, points, peak = await measure(session_maker, fn, stock_id, days, args.count, args.repeat)
+                results[name] = elapsed
+                print(f"{label:>12} ({min(rows, args.candles):>6} свечей) {name:>10}: "
+                      f"{elapsed * 1000:8.1f} ms, пик памяти {peak / 1e6:6.2f} MB, точек {points}")
+
+            python, sql = results.values()
+            print(f"[✓] {label}: ускорение x{python / sql:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Последние N свечей по акциям портфеля: прежний полный проход по истории
+(WHERE stock_id IN (...) без LIMIT, отбор N в Python) против _last_n_per_stock
+(LATERAL ... LIMIT n по индексу uix_stock_date) — по мере роста stock_prices.
+
+Нужен PostgreSQL из настроек приложения; всё пишется во временную схему.
+
+    python -m bench.last_n [--sizes 100000 1000000 10000000] [--stocks 200] [--portfolio 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from bench.db import scratch_session_maker, seed_prices, seed_stocks
+from src.modules.stock_prices.models import StockPrice
+from src.modules.stock_prices.repository import StockPriceRepository
+
+
+async def full_scan_latest_map(session, stock_ids: list[int], per_stock: int = 2):
+    # Прежний StockPriceRepository.get_latest_map (continue в нём ничего не отсекал)
+    stmt = (
+        select(StockPrice)
+        .where(StockPrice.stock_id.in_(stock_ids))
+        .order_by(StockPrice.stock_id, StockPrice.date.desc())
+    )
+    result = await session.execute(stmt)
+    grouped = defaultdict(list)
+    for p in result.scalars().all():
+        grouped[p.stock_id].append(p)
+    return grouped
+
+
+async def full_scan_last_closes_map(session, stock_ids: list[int], n: int = 10):
+    # Прежний StockPriceRepository.get_last_closes_map
+    stmt = (
+        select(StockPrice)
+        .where(StockPrice.stock_id.in_(stock_ids))
+        .order_by(StockPrice.stock_id, StockPrice.date.desc())
+    )
+    result = await session.execute(stmt)
+    grouped = defaultdict(list)
+    for row in result.scalars().all():
+        if len(grouped[row.stock_id]) < n:
+            grouped[row.stock_id].append(row.close)
+    return grouped
+
+
+async def full_scan(session, stock_ids: list[int]):
+    # GET /portfolio/ вызывает оба метода
+    await full_scan_latest_map(session, stock_ids)
+    await full_scan_last_closes_map(session, stock_ids)
+
+
+async def last_n(session, stock_ids: list[int]):
+    repo = StockPriceRepository(session)
+    await repo.get_latest_map(stock_ids)
+    await repo.get_last_closes_map(stock_ids)
+
+
+async def measure(session_maker, fn, stock_ids: list[int], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        async with session_maker() as session:
+            started = time.perf_counter()
+            await fn(session, stock_ids)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000],
+                        help="размеры stock_prices, по возрастанию")
+    parser.add_argument("--stocks", type=int, default=200, help="акций в таблице")
+    parser.add_argument("--portfolio", type=int, default=20, help="акций в портфеле")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    async with scratch_session_maker() as session_maker:
+        stock_ids = await seed_stocks(session_maker, args.stocks)
+        portfolio = stock_ids[:: max(1, args.stocks // args.portfolio)][: args.portfolio]
+        per_stock = 0
+
+        for size in sorted(args.sizes):
+            # Дозаливаем историю до нужного размера таблицы
+            target = size // args.stocks
+            await seed_prices(session_maker, stock_ids, target - per_stock, offset=per_stock)
+            per_stock = target
+
+            scan = await measure(session_maker, full_scan, portfolio, args.repeat)
+            lateral = await measure(session_maker, last_n, portfolio, args.repeat)
+            print(f"{per_stock * args.stocks:>12,} строк: полный проход {scan * 1000:9.1f} ms, "
+                  f"LATERAL LIMIT {lateral * 1000:7.1f} ms (x{scan / lateral:.0f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Шторм логинов: задержка /ping, пока параллельные клиенты непрерывно бьют в /login.
+bcrypt прямо в обработчике (как было в AuthService) против PasswordHasher
+(ограниченный пул потоков). Запросы идут через ASGI в одном event loop, как в uvicorn.
+
+    python -m bench.login_storm [--clients 16] [--duration 5] [--rounds 12]
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import bench.offline  # noqa: F401  — до импорта src
+import httpx
+from fastapi import FastAPI
+from passlib.context import CryptContext
+from pydantic import BaseModel
+
+from src.core.config import settings
+from src.modules.auth.hashing import PasswordHasher
+
+
+PASSWORD = "correct horse battery staple"
+
+
+class LoginIn(BaseModel):
+    password: str
+
+
+def make_app(context: CryptContext, hasher: PasswordHasher, hashed: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/login-inline")
+    async def login_inline(data: LoginIn):
+        # Прежний AuthService._verify_password: синхронно внутри async-обработчика
+        return {"ok": context.verify(data.password, hashed)}
+
+    @app.post("/login")
+    async def login(data: LoginIn):
+        return {"ok": await hasher.verify(data.password, hashed)}
+
+    return app
+
+
+async def storm(client: httpx.AsyncClient, path: str, stop: asyncio.Event, statuses: Counter) -> None:
+    while not stop.is_set():
+        response = await client.post(path, json={"password": PASSWORD})
+        statuses[response.status_code] += 1
+        # ASGITransport не ходит в сеть и сам не уступает event loop — уступаем, как сокет
+        await asyncio.sleep(0)
+
+
+async def ping_latencies(client: httpx.AsyncClient, duration: float, interval: float = 0.01) -> list[float]:
+    timings = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        due = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        response = await client.get("/ping")
+        # Запрос "пришёл" в due: задержка включает время, пока event loop был занят bcrypt
+        timings.append(time.perf_counter() - due)
+        assert response.status_code == 200
+    return sorted(timings)
+
+
+async def scenario(client: httpx.AsyncClient, login_path: str | None, clients: int, duration: float):
+    stop = asyncio.Event()
+    statuses = Counter()
+    started = time.perf_counter()
+    storms = [asyncio.create_task(storm(client, login_path, stop, statuses)) for _ in range(clients if login_path else 0)]
+    timings = await ping_latencies(client, duration)
+    stop.set()
+    await asyncio.gather(*storms)
+    return timings, statuses, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16, help="параллельных клиентов /login")
+    parser.add_argument("--duration", type=float, default=5.0, help="секунд на сценарий")
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=args.rounds)
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers, max_pending=settings.PASSWORD_HASH_MAX_PENDING)
+    hashed = context.hash(PASSWORD)
+
+    transport = httpx.ASGITransport(app=make_app(context, hasher, hashed))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, path in (("без логинов", None), ("bcrypt в обработчике", "/login-inline"),
+                           ("PasswordHasher", "/login")):
+            timings, statuses, elapsed = await scenario(client, path, args.clients, args.duration)
+            p50 = timings[len(timings) // 2]
+            p99 = timings[int(len(timings) * 0.99)]
+            print(f"{name:>22}: /ping p50 {p50 * 1000:8.2f} ms, p99 {p99 * 1000:8.2f} ms "
+                  f"({len(timings)} запросов), логинов {sum(statuses.values()) / elapsed:5.1f}/с {dict(statuses) or ''}")
+
+    print(f"[i] PasswordHasher: {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
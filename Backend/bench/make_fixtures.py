@@ -0,0 +1,66 @@
+"""
+Генерирует фикстуры бенчмарков в формате ответов ISS.
+
+    python -m bench.make_fixtures
+
+Записать настоящий ответ можно и вручную, например
+    curl 'https://iss.moex.com/iss/engines/stock/markets/shares/securities/SBER/candles.json?from=2022-01-01&till=2024-12-31&interval=60' | gzip > bench/fixtures/iss_candles_1h.json.gz
+(ISS отдаёт до 500 свечей за запрос, страницы склеиваются по ``data``).
+"""
+import gzip
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+CANDLE_COLUMNS = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+
+
+def candles_payload(rows: int = 20000, seed: int = 42) -> dict:
+    """Часовые свечи одной бумаги: случайное блуждание цены, торговые часы 10–18, без выходных."""
+    rnd = random.Random(seed)
+    price = 250.0
+    data = []
+    day = datetime(2021, 1, 4)
+    while len(data) < rows:
+        if day.weekday() < 5:
+            for hour in range(10, 19):
+                begin = day + timedelta(hours=hour)
+                open_ = price
+                close = max(1.0, round(open_ * (1 + rnd.gauss(0, 0.004)), 2))
+                high = round(max(open_, close) * (1 + abs(rnd.gauss(0, 0.002))), 2)
+                low = round(min(open_, close) * (1 - abs(rnd.gauss(0, 0.002))), 2)
+                volume = rnd.randint(10_000, 3_000_000)
+                row = [open_, close, high, low, round(volume * close, 1), volume,
+                       begin.strftime("%Y-%m-%d %H:%M:%S"),
+                       (begin + timedelta(minutes=59, seconds=59)).strftime("%Y-%m-%d %H:%M:%S")]
+                # Изредка ISS отдаёт свечу без части цен — такие строки разбор отбрасывает
+                if rnd.random() < 0.002:
+                    row[2] = row[3] = None
+                data.append(row)
+                price = close
+        day += timedelta(days=1)
+    return {"candles": {"columns": CANDLE_COLUMNS, "data": data[:rows]}}
+
+
+def write(name: str, payload: dict) -> Path:
+    path = FIXTURES / name
+    path.parent.mkdir(exist_ok=True)
+    # mtime=0: одинаковые данные дают побайтно одинаковый файл
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(json.dumps(payload).encode())
+    return path
+
+
+def load(name: str) -> bytes:
+    path = FIXTURES / name
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    path = write("iss_candles_1h.json.gz", candles_payload())
+    print(f"[✓] {path} ({len(load(path.name)) / 1e6:.1f} MB без сжатия)")
@@ -0,0 +1,18 @@
+import os
+
+# Бенчмарки без БД: заглушки обязательных настроек, если нет .env/окружения.
+# Импортировать до любого модуля src.
+for key, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "bench",
+    "DB_PASS": "bench",
+    "DB_NAME": "bench",
+    "JWT_SECRET_KEY": "bench-secret",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "REFRESH_TOKEN_EXPIRE_MINUTES": "1440",
+    "PROJECT_ID": "bench-app",
+    "ONESIGNAL_API_KEY": "bench-key",
+}.items():
+    os.environ.setdefault(key, value)
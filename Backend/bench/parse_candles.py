@@ -0,0 +1,86 @@
+"""
+Разбор ответа ISS candles.json: построчный путь (как было до колоночного разбора —
+strptime и ORM-объект StockPrice на свечу) против parse_candles_page.
+
+    python -m bench.parse_candles [--file ответ.json[.gz]] [--repeat 5]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+import bench.offline  # noqa: F401  — до импорта src
+from bench.make_fixtures import FIXTURES, load
+from src.modules.stock_prices.models import StockPrice
+from src.modules.stock_prices.parsing import parse_candles_page
+
+
+def parse_rows(raw: bytes) -> list[StockPrice]:
+    data = json.loads(raw)
+    columns = data.get("candles", {}).get("columns", [])
+    rows = data.get("candles", {}).get("data", [])
+    idx = {col: i for i, col in enumerate(columns)}
+
+    prices = []
+    for row in rows:
+        try:
+            begin = datetime.strptime(row[idx["begin"]], "%Y-%m-%d %H:%M:%S")
+            prices.append(StockPrice(
+                stock_id=1,
+                date=begin,
+                open=row[idx["open"]],
+                high=row[idx["high"]],
+                low=row[idx["low"]],
+                close=row[idx["close"]],
+                volume=row[idx["volume"]],
+                value=row[idx["value"]],
+            ))
+        except Exception:
+            continue
+    return prices
+
+
+def measure(fn, raw: bytes, repeat: int) -> tuple[float, int, int]:
+    """Лучшее время из ``repeat`` прогонов, число свечей и пик памяти (отдельным прогоном)."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = fn(raw)
+        best = min(best, time.perf_counter() - started)
+        rows = len(result)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, rows, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default=str(FIXTURES / "iss_candles_1h.json.gz"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = load(args.file)
+    print(f"[i] {args.file}: {len(raw) / 1e6:.1f} MB")
+
+    results = {}
+    for name, fn in (("построчно + ORM", parse_rows), ("parse_candles_page", parse_candles_page)):
+        elapsed, rows, peak = measure(fn, raw, args.repeat)
+        results[name] = elapsed
+        print(f"{name:>20}: {elapsed * 1000:8.1f} ms, {rows / elapsed:>12,.0f} свечей/с, "
+              f"пик памяти {peak / 1e6:6.1f} MB, свечей {rows}")
+
+    baseline, columnar = results.values()
+    print(f"[✓] Ускорение: x{baseline / columnar:.1f}")
+
+
+if __name__ == "__main__":
+    main()
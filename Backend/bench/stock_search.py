@@ -0,0 +1,134 @@
+"""
+Поиск тикеров по 1–3 символам: прежний search_stocks (LIKE '%q%' по всем инструментам,
+фильтр TQBR и сортировка в Python) против StockSearchIndex.search. Цель — p99 < 5 ms.
+
+Часть LIKE прежнего пути эмулируется в Python, поэтому его время — нижняя
+оценка: без индекса PostgreSQL ещё и читал всю таблицу stocks.
+
+    python -m bench.stock_search [--stocks 3000] [--tqbr 250] [--queries 3000]
+"""
+import argparse
+import random
+import string
+import time
+
+import bench.offline  # noqa: F401  — до импорта src
+from src.modules.stocks.models import Stock
+from src.modules.stocks.schemas import StockSearchOut
+from src.modules.stocks.search import SEARCH_BOARD, SEARCH_LIMIT, StockSearchIndex
+
+
+TARGET_P99_MS = 5.0
+BOARDS = ("TQBR", "TQTF", "TQCB", "TQOB", "SMAL", "EQRP")
+CYRILLIC = "абвгдеёжзийклмнопрстуфхцчшщыэюя"
+WORDS = ["банк", "нефть", "газ", "энерго", "сеть", "металл", "ао", "ап", "пао", "групп", "холдинг", "телеком"]
+
+
+def make_stocks(count: int, tqbr: int, rnd: random.Random) -> list[Stock]:
+    stocks = []
+    for i in range(1, count + 1):
+        symbol = "".join(rnd.choices(string.ascii_uppercase, k=rnd.randint(3, 5)))
+        word = "".join(rnd.choices(CYRILLIC, k=rnd.randint(3, 8))).capitalize()
+        shortname = f"{word}{rnd.choice(WORDS)}-{rnd.choice(['ао', 'ап', ''])}".rstrip("-")
+        board = SEARCH_BOARD if i <= tqbr else rnd.choice(BOARDS[1:])
+        stocks.append(Stock(id=i, symbol=symbol, shortname=shortname, board=board))
+    rnd.shuffle(stocks)
+    return stocks
+
+
+def like_scan(stocks: list[Stock], text: str) -> list[StockSearchOut]:
+    # Прежний StockService.search_stocks поверх результата LIKE '%q%' без фильтра по режиму
+    q = text.lower()
+    matched = [s for s in stocks if q in (s.symbol or "").lower() or q in (s.shortname or "").lower()]
+
+    filtered = [
+        s for s in matched
+        if s.board == "TQBR" and (
+            text.lower() in (s.symbol or "").lower() or
+            text.lower() in (s.shortname or "").lower()
+        )
+    ]
+
+    def relevance(stock):
+        symbol_pos = (stock.symbol or "").lower().find(text.lower())
+        name_pos = (stock.shortname or "").lower().find(text.lower())
+        symbol_pos = symbol_pos if symbol_pos >= 0 else 999
+        name_pos = name_pos if name_pos >= 0 else 999
+        return min(symbol_pos, name_pos), stock.id
+
+    sorted_results = sorted(filtered, key=relevance)
+
+    return [
+        StockSearchOut(id=s.id, symbol=s.symbol, shortname=s.shortname)
+        for s in sorted_results[:SEARCH_LIMIT]
+    ]
+
+
+def make_queries(stocks: list[Stock], count: int, rnd: random.Random) -> list[str]:
+    # Как набирает пользователь: начало тикера или названия, иногда — середина
+    queries = []
+    while len(queries) < count:
+        stock = rnd.choice(stocks)
+        key = rnd.choice([stock.symbol, stock.shortname])
+        length = rnd.randint(1, 3)
+        start = 0 if rnd.random() < 0.8 else rnd.randrange(max(1, len(key) - length))
+        queries.append(key[start:start + length])
+    return queries
+
+
+def percentiles(fn, queries: list[str]) -> dict[int, dict[str, float]]:
+    """p50/p99 в мс по длине запроса."""
+    by_length: dict[int, list[float]] = {}
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        by_length.setdefault(len(q), []).append((time.perf_counter() - started) * 1000)
+
+    result = {}
+    for length, timings in sorted(by_length.items()):
+        timings.sort()
+        result[length] = {
+            "p50": timings[len(timings) // 2],
+            "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stocks", type=int, default=3000, help="инструментов во всех режимах")
+    parser.add_argument("--tqbr", type=int, default=250, help="из них в TQBR")
+    parser.add_argument("--queries", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    stocks = make_stocks(args.stocks, args.tqbr, rnd)
+    queries = make_queries([s for s in stocks if s.board == SEARCH_BOARD], args.queries, rnd)
+
+    index = StockSearchIndex()
+    started = time.perf_counter()
+    index.rebuild([
+        StockSearchOut(id=s.id, symbol=s.symbol, shortname=s.shortname)
+        for s in stocks if s.board == SEARCH_BOARD
+    ])
+    print(f"[i] Индекс: {args.tqbr} инструментов TQBR за {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for q in queries[:200]:
+        assert index.search(q) == like_scan(stocks, q), q
+
+    results = {
+        "LIKE + Python": percentiles(lambda q: like_scan(stocks, q), queries),
+        "StockSearchIndex": percentiles(index.search, queries),
+    }
+    for name, by_length in results.items():
+        for length, p in by_length.items():
+            print(f"{name:>16}, {length} симв.: p50 {p['p50']:7.3f} ms, p99 {p['p99']:7.3f} ms")
+
+    worst = max(p["p99"] for p in results["StockSearchIndex"].values())
+    mark = "[✓]" if worst < TARGET_P99_MS else "[!]"
+    print(f"{mark} Худший p99 индекса {worst:.3f} ms (цель < {TARGET_P99_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
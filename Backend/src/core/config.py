@@ -8,14 +8,49 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_NAME: str
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # секунд; меньше idle-таймаутов PgBouncer/балансировщика
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # подготовленных выражений asyncpg на соединение
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+
+    DB_JOBS_POOL_SIZE: int = 5
+    DB_JOBS_MAX_OVERFLOW: int = 5
+    DB_JOBS_STATEMENT_TIMEOUT_MS: int = 0  # без ограничения: массовые upsert'ы бывают долгими
+
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_MINUTES: int
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # сверх этого login/register отвечают 503
 
     PROJECT_ID: str
     ONESIGNAL_API_KEY: str
-    
+    ONESIGNAL_API_URL: str = "https://api.onesignal.com"
+    PUSH_WORKERS: int = 16
+    PUSH_TARGET_CACHE_SIZE: int = 10000
+    PUSH_TARGET_CACHE_TTL: int = 86400
+
+    MOEX_ISS_URL: str = "https://iss.moex.com/iss"
+    MOEX_SYNC_CONCURRENCY: int = 8
+    MOEX_RATE_LIMIT: float = 20.0  # запросов в секунду к ISS
+    MOEX_WINDOW_RETRIES: int = 3
+    MOEX_CATALOG_PIPELINE: int = 4  # страниц каталога в полёте одновременно
+
+    COLOR_DOWNLOAD_CONCURRENCY: int = 8
+    COLOR_WORKERS: int = 2  # процессов для растеризации SVG
+
+    QUOTE_CACHE_SIZE: int = 5000
+    QUOTE_CACHE_TTL: int = 3900  # чуть больше часа: между синхронизациями свечей
+
+    METRICS_TOKEN: str | None = None  # без токена /metrics выключен
+
     @property
     def DB_URL(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
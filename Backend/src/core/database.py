@@ -1,13 +1,89 @@
+import time
+from dataclasses import dataclass, asdict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.core.config import settings
 
 
-# Создание асинхронного движка
-engine = create_async_engine(
-    settings.DB_URL,
-    # echo=True,
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    waited: int = 0  # выдачи, которым пришлось ждать свободное соединение
+    timeouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который меряет время ожидания соединения при checkout."""
+
+    # Ожидание короче этого считаем мгновенной выдачей из пула
+    WAIT_THRESHOLD = 0.001
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.metrics.checkouts += 1
+            self.metrics.wait_total += waited
+            self.metrics.wait_max = max(self.metrics.wait_max, waited)
+            if waited >= self.WAIT_THRESHOLD:
+                self.metrics.waited += 1
+
+    def recreate(self):
+        # Пересозданный пул (например, после dispose) продолжает те же метрики
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict:
+        data = asdict(self.metrics)
+        data["wait_avg"] = self.metrics.wait_total / self.metrics.checkouts if self.metrics.checkouts else 0.0
+        data.update(size=self.size(), checked_out=self.checkedout(), overflow=self.overflow())
+        return data
+
+
+def _create_engine(pool_size: int, max_overflow: int, statement_timeout_ms: int):
+    server_settings = {"application_name": "stock-watch"}
+    if statement_timeout_ms:
+        server_settings["statement_timeout"] = str(statement_timeout_ms)
+
+    return create_async_engine(
+        settings.DB_URL,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": server_settings,
+        },
+        # echo=True,
+    )
+
+
+# Создание асинхронного движка — для запросов API
+engine = _create_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS)
+
+# Отдельный пул для фоновых задач (синхронизация, алерты, backfill): долгие
+# загрузки не забирают соединения у API, и у них свой statement_timeout
+jobs_engine = _create_engine(
+    settings.DB_JOBS_POOL_SIZE, settings.DB_JOBS_MAX_OVERFLOW, settings.DB_JOBS_STATEMENT_TIMEOUT_MS
 )
 
 # Создание асинхронной сессии
@@ -16,6 +92,11 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+jobs_session_maker = async_sessionmaker(
+    bind=jobs_engine,
+    expire_on_commit=False
+)
+
 # Базовый класс для всех моделей
 class Base(DeclarativeBase):
     pass
@@ -24,3 +105,7 @@ class Base(DeclarativeBase):
 async def get_async_session():
     async with async_session_maker() as session:
         yield session
+
+
+def pool_stats() -> dict:
+    return {"api": engine.pool.stats(), "jobs": jobs_engine.pool.stats()}
@@ -1,11 +1,11 @@
+import secrets
 from typing import Annotated
  
 from fastapi import Depends, HTTPException, Query, Request, Header
-from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from src.modules.auth.service import AuthService
-from src.core.database import get_async_session
+from src.core.config import settings
+from src.modules.auth.tokens import token_verifier
 
 
 class PaginationParams(BaseModel):
@@ -15,8 +15,8 @@ class PaginationParams(BaseModel):
 
 async def get_current_user_id(
     authorization: Annotated[str | None, Header()] = None,
-    session: AsyncSession = Depends(get_async_session),
 ) -> int:
+    # Без сессии и без сервиса: только подпись токена (с кэшем недавно проверенных)
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing Authorization header")
 
@@ -24,8 +24,7 @@ async def get_current_user_id(
     if scheme.lower() != "bearer" or not token:
         raise HTTPException(status_code=401, detail="Invalid Authorization header")
 
-    auth_service = AuthService(session)
-    payload = auth_service.decode_token(token)
+    payload = token_verifier.verify(token)
 
     if "user_id" not in payload:
         raise HTTPException(status_code=401, detail="Invalid token payload")
@@ -33,5 +32,15 @@ async def get_current_user_id(
     return payload["user_id"]
 
 
+async def verify_metrics_token(
+    x_metrics_token: Annotated[str | None, Header()] = None,
+) -> None:
+    # Внутренние метрики: только по отдельному токену из настроек, не по JWT пользователя
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_metrics_token or not secrets.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+
 UserIdDep = Annotated[int, Depends(get_current_user_id)]
 PaginationDep = Annotated[PaginationParams, Depends()]
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Шина событий новой цены.
+
+Шина и индекс алертов (``src.modules.notify.index``) живут в памяти одного
+процесса: событие видит только вычислитель алертов того же процесса. При
+нескольких воркерах uvicorn каждый строит свой индекс, а публикует — только
+тот, где работает планировщик; повторную отправку одного алерта исключает
+``AlertRepository.claim``, но сама схема рассчитана на один процесс API.
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class PriceEvent:
+    stock_id: int
+    close: float
+    date: datetime
+
+
+class PriceEventBus:
+    """
+    Внутрипроцессная шина событий "новая цена по акции".
+
+    Публикуется после коммита данных, потребитель — вычислитель алертов.
+    События по одной акции схлопываются: пока предыдущее не обработано,
+    хранится только самая свежая цена, поэтому очередь не длиннее числа акций.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+        self._pending: dict[int, PriceEvent] = {}
+        self.published = 0
+        self.coalesced = 0
+        self.consumed = 0
+
+    def publish(self, event: PriceEvent) -> None:
+        self.published += 1
+        if event.stock_id in self._pending:
+            self.coalesced += 1
+        else:
+            self._queue.put_nowait(event.stock_id)
+        self._pending[event.stock_id] = event
+
+    async def get(self) -> PriceEvent:
+        stock_id = await self._queue.get()
+        self.consumed += 1
+        return self._pending.pop(stock_id)
+
+    def get_nowait(self) -> PriceEvent | None:
+        try:
+            stock_id = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self.consumed += 1
+        return self._pending.pop(stock_id)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "consumed": self.consumed,
+        }
+
+
+price_events = PriceEventBus()
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from dataclasses import dataclass, asdict
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.core.config import settings
+from src.core.rate_limiter import RateLimiter
+
+
+# Статусы, при которых имеет смысл повторить идемпотентный запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+@dataclass
+class HostPolicy:
+    max_connections: int = 10
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    retries: int = 2
+    backoff: float = 0.5
+    rate_limit: float | None = None  # запросов в секунду на хост, общий для всех вызывающих
+    rate_burst: int = 1
+
+
+@dataclass
+class HostMetrics:
+    requests: int = 0
+    pool_hits: int = 0
+    new_connections: int = 0
+    connect_time_total: float = 0.0
+    in_flight: int = 0
+    retries: int = 0
+    errors: int = 0
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        data["connect_time_avg"] = (
+            self.connect_time_total / self.new_connections if self.new_connections else 0.0
+        )
+        return data
+
+
+class HttpClientRegistry:
+    """
+    Общие httpx-клиенты на всё время жизни приложения — по одному на хост.
+
+    Соединения переиспользуются между запросами (keep-alive), у каждого хоста
+    свои лимиты пула, таймауты и политика повторов. Закрывается в lifespan.
+    """
+
+    def __init__(self, policies: dict[str, HostPolicy] | None = None, default: HostPolicy | None = None):
+        self.policies = policies or {}
+        self.default = default or HostPolicy()
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._metrics: dict[str, HostMetrics] = {}
+        self._limiters: dict[str, RateLimiter] = {}
+
+    def policy(self, host: str) -> HostPolicy:
+        return self.policies.get(host, self.default)
+
+    def client(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            policy = self.policy(host)
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(policy.timeout, connect=policy.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=policy.max_connections,
+                    max_keepalive_connections=policy.max_keepalive_connections,
+                    keepalive_expiry=policy.keepalive_expiry,
+                ),
+            )
+            self._clients[host] = client
+        return client
+
+    def limiter(self, host: str) -> RateLimiter | None:
+        """Один token bucket на хост: все запросы процесса к нему делят общий лимит."""
+        policy = self.policy(host)
+        if not policy.rate_limit:
+            return None
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = RateLimiter(policy.rate_limit, burst=policy.rate_burst)
+        return limiter
+
+    def metrics(self, host: str) -> HostMetrics:
+        return self._metrics.setdefault(host, HostMetrics())
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).hostname or ""
+        policy = self.policy(host)
+        metrics = self.metrics(host)
+        client = self.client(host)
+        limiter = self.limiter(host)
+        method = method.upper()
+
+        attempt = 0
+        while True:
+            connect = {}
+
+            async def trace(event: str, info: dict):
+                if event == "connection.connect_tcp.started":
+                    connect["started"] = time.perf_counter()
+                elif event == "connection.connect_tcp.complete":
+                    connect["elapsed"] = time.perf_counter() - connect.get("started", time.perf_counter())
+
+            # Повторы тоже расходуют лимит хоста
+            if limiter:
+                await limiter.acquire()
+
+            metrics.requests += 1
+            metrics.in_flight += 1
+            try:
+                response = await client.request(method, url, extensions={"trace": trace}, **kwargs)
+            except httpx.TransportError as e:
+                metrics.errors += 1
+                # Неидемпотентный запрос повторяем, только если он точно не ушёл
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, httpx.ConnectError)
+                if not retryable or attempt >= policy.retries:
+                    raise
+            else:
+                if method not in IDEMPOTENT_METHODS or response.status_code not in RETRY_STATUSES \
+                        or attempt >= policy.retries:
+                    return response
+                await response.aclose()
+            finally:
+                metrics.in_flight -= 1
+                if "started" in connect:
+                    metrics.new_connections += 1
+                    metrics.connect_time_total += connect.get("elapsed", 0.0)
+                else:
+                    metrics.pool_hits += 1
+
+            attempt += 1
+            metrics.retries += 1
+            await asyncio.sleep(policy.backoff * 2 ** (attempt - 1))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        return {host: m.snapshot() for host, m in self._metrics.items()}
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(c.aclose() for c in clients.values()))
+
+
+http_clients = HttpClientRegistry(
+    policies={
+        urlsplit(settings.MOEX_ISS_URL).hostname: HostPolicy(
+            max_connections=settings.MOEX_SYNC_CONCURRENCY,
+            max_keepalive_connections=settings.MOEX_SYNC_CONCURRENCY,
+            rate_limit=settings.MOEX_RATE_LIMIT,
+            rate_burst=settings.MOEX_SYNC_CONCURRENCY,
+        ),
+        urlsplit(settings.ONESIGNAL_API_URL).hostname: HostPolicy(
+            max_connections=settings.PUSH_WORKERS,
+            max_keepalive_connections=settings.PUSH_WORKERS,
+            retries=3,
+        ),
+        "finrange.com": HostPolicy(max_connections=8, max_keepalive_connections=8, retries=1),
+    },
+)
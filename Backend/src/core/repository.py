@@ -29,6 +29,27 @@ class BaseRepository:
         result = await self.session.execute(select(self.model))
         return [self.schema.model_validate(obj, from_attributes=True) for obj in result.scalars().all()]
 
+    async def get_page(self, limit: int | None, offset: int = 0, after_id: int | None = None, **filter_by):
+        """
+        Страница по id: OFFSET/LIMIT, либо keyset (``id > after_id``) — тогда
+        ``offset`` не нужен и глубина страницы не влияет на скорость запроса.
+        ``limit=None`` — без ограничения, все строки после смещения.
+        """
+        query = select(self.model).filter_by(**filter_by)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(self.model.id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.session.execute(query)
+        return [self.schema.model_validate(obj, from_attributes=True) for obj in result.scalars().all()]
+
+    async def count(self, **filter_by) -> int:
+        return await self.session.scalar(select(func.count()).select_from(self.model).filter_by(**filter_by))
+
     async def get_all_by(self, **filter_by):
         result = await self.session.execute(select(self.model).filter_by(**filter_by))
         return [self.schema.model_validate(obj, from_attributes=True) for obj in result.scalars().all()]
@@ -6,7 +6,7 @@ import logging
 
 from src.modules.stock_prices.service import StockPriceService
 from src.modules.notify.service import AlertService
-from src.core.database import async_session_maker
+from src.core.database import jobs_session_maker
 
 
 MOSCOW = pytz.timezone("Europe/Moscow")
@@ -18,10 +18,20 @@ async def sync_tqbr_prices():
     now = datetime.now(MOSCOW)
     logging.info(f"[{now}] Старт синхронизации TQBR")
 
-    async with async_session_maker() as session:
+    # Алерты проверяет AlertEvaluator по событиям новой цены — сразу после коммита каждой акции
+    async with jobs_session_maker() as session:
         price_service = StockPriceService(session)
         await price_service.sync_from_moex(board="TQBR", from_date=None, till_date=None)
 
-        # После обновления цен проверяем алерты
-        alert_service = AlertService(session)
-        await alert_service.check_all()
+
+async def reconcile_alerts():
+    """Полная сверка алертов: ловит то, что не пришло событием (например, алерт создан уже за порогом)."""
+    async with jobs_session_maker() as session:
+        await AlertService(session).check_all()
+
+
+async def sync_tqbr_quotes():
+    now = datetime.now(MOSCOW)
+    logging.info(f"[{now}] Снимок котировок TQBR")
+
+    await StockPriceService.sync_snapshot_from_moex(board="TQBR")
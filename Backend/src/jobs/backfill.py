@@ -0,0 +1,103 @@
+# Отдельный процесс для загрузки истории свечей — не делит event loop и пул БД с API.
+#
+#   python -m src.jobs.backfill --board TQBR --from 2015-01-01
+#   python -m src.jobs.backfill --job-id 12            # возобновить задачу с чекпоинта
+#   python -m src.jobs.backfill --worker               # выполнять задачи из POST /prices/sync
+#   python -m src.jobs.backfill --rebuild-rollups      # построить свёртки по уже загруженной истории
+
+import argparse
+import asyncio
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.core.database import jobs_session_maker
+from src.core.http_client import http_clients
+from src.modules.stock_prices.repository import BATCH_UPSERT_CHUNK_SIZE, BackfillJobRepository
+from src.modules.stock_prices.service import StockPriceService
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Загрузка истории свечей MOEX")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--board", help="Режим торгов, например TQBR")
+    mode.add_argument("--job-id", type=int, help="Выполнить или возобновить существующую задачу")
+    mode.add_argument("--worker", action="store_true", help="Брать задачи из очереди backfill_jobs")
+    mode.add_argument("--rebuild-rollups", action="store_true", help="Построить дневные/недельные свёртки по истории")
+
+    parser.add_argument("--from", dest="from_date", help="Формат: YYYY-MM-DD")
+    parser.add_argument("--till", dest="till_date", help="Формат: YYYY-MM-DD")
+    parser.add_argument("--symbol", help="Только одна бумага")
+    parser.add_argument("--concurrency", type=int, default=None, help="Акций одновременно")
+    parser.add_argument("--batch-size", type=int, default=BATCH_UPSERT_CHUNK_SIZE, help="Свечей в одном INSERT")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Процессов для разбора ответов ISS (0 — без пула)")
+    parser.add_argument("--poll-interval", type=float, default=10.0, help="Пауза между опросами очереди, с")
+    parser.add_argument("--force", action="store_true", help="С --rebuild-rollups: перестроить для всех акций")
+    return parser.parse_args()
+
+
+async def run_job(job_id: int, args: argparse.Namespace, executor: ProcessPoolExecutor | None) -> None:
+    job = await StockPriceService.run_backfill_job(
+        job_id,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        executor=executor,
+    )
+    print(f"[i] Задача {job.id}: {job.status}, акций {job.done_stocks}/{job.total_stocks}, "
+          f"добавлено {job.added}" + (f" — {job.error}" if job.error else ""))
+
+
+async def create_job(args: argparse.Namespace) -> int:
+    async with jobs_session_maker() as session:
+        # Задачу сразу выполняет этот процесс: вставляем её уже в статусе running,
+        # чтобы воркер не успел забрать её из очереди
+        job = await StockPriceService(session).enqueue_backfill(
+            args.board, args.from_date, args.till_date, args.symbol, status="running"
+        )
+        return job.id
+
+
+async def worker_loop(args: argparse.Namespace, executor: ProcessPoolExecutor | None) -> None:
+    print("[i] Воркер backfill запущен")
+    while True:
+        try:
+            async with jobs_session_maker() as session:
+                job_id = await BackfillJobRepository(session).claim_next()
+                await session.commit()
+        except Exception as e:
+            print(f"[!] Не удалось взять задачу из очереди: {e}")
+            job_id = None
+
+        if job_id is None:
+            await asyncio.sleep(args.poll_interval)
+            continue
+
+        # Упавшая задача уже помечена failed — воркер продолжает со следующей
+        try:
+            await run_job(job_id, args, executor)
+        except Exception as e:
+            print(f"[!] Задача {job_id} завершилась с ошибкой: {e}")
+
+
+async def main() -> None:
+    args = parse_args()
+    executor = ProcessPoolExecutor(max_workers=args.parse_workers) if args.parse_workers > 0 else None
+
+    try:
+        if args.rebuild_rollups:
+            await StockPriceService.rebuild_rollups(force=args.force)
+        elif args.worker:
+            await worker_loop(args, executor)
+        else:
+            job_id = args.job_id or await create_job(args)
+            await run_job(job_id, args, executor)
+    finally:
+        await http_clients.aclose()
+        if executor:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,19 +1,33 @@
 # ngrok http --url=fit-frequently-sturgeon.ngrok-free.app 8000
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 from fastapi.openapi.utils import get_openapi
 import uvicorn
 from contextlib import asynccontextmanager
+from sqlalchemy import text
 from apscheduler.triggers.cron import CronTrigger
 
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.core.database import engine, Base
-from src.core.scheduler import scheduler, sync_tqbr_prices
+from src.core.dependencies import verify_metrics_token
+from src.core.database import async_session_maker, engine, jobs_engine, pool_stats, Base
+from src.core.http_client import http_clients
+from src.modules.auth.hashing import password_hasher
+from src.modules.auth.tokens import token_verifier
+from src.modules.notify.evaluator import alert_evaluator
+from src.modules.notify.index import alert_index
+from src.modules.notify.service import AlertService
+from src.modules.notify.subscriptions import push_targets
+from src.modules.stock_prices.cache import quote_cache
+from src.modules.stocks.colors import shutdown_executor as shutdown_color_executor
+from src.modules.stocks.search import search_index
+from src.modules.stocks.service import StockService
+from src.core.events import price_events
+from src.core.scheduler import scheduler, reconcile_alerts, sync_tqbr_prices, sync_tqbr_quotes
 from src.modules.users.router import router as router_users
 from src.modules.auth.router import router as router_auth
 from src.modules.stocks.router import router as router_stocks
@@ -26,16 +40,34 @@ from src.modules.notify.router import router as router_alerts
 async def lifespan(app: FastAPI):
     # >>> Секция старта
     async with engine.begin() as conn:
+        # Триграммные индексы поиска акций требуют pg_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
 
+    # Индекс порогов алертов строится один раз, дальше поддерживается сервисом
+    async with async_session_maker() as session:
+        await AlertService(session).rebuild_index()
+        await StockService(session).rebuild_search_index()
+    alert_evaluator.start()
+
     # Запускаем APScheduler: каждый час с 6:00 до 23:00 по МСК
     scheduler.add_job(sync_tqbr_prices, CronTrigger(hour="6-23", minute=0, second=10))
+    # Снимок последних цен всего TQBR одним запросом — каждые 5 минут
+    scheduler.add_job(sync_tqbr_quotes, CronTrigger(hour="6-23", minute="*/5", second=30))
+    # Страховочная полная проверка алертов — раз в час, независимо от синхронизации
+    scheduler.add_job(reconcile_alerts, CronTrigger(hour="6-23", minute=45))
     scheduler.start()
 
     yield
 
     # >>> Секция остановки (если что-то нужно закрывать при остановке)
     scheduler.shutdown()
+    await alert_evaluator.stop()
+    await http_clients.aclose()
+    password_hasher.shutdown()
+    shutdown_color_executor()
+    await engine.dispose()
+    await jobs_engine.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -47,6 +79,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Разрешить все методы (GET, POST и т.д.)
     allow_headers=["*"],  # Разрешить все заголовки
+    expose_headers=["X-Total-Count"],  # Общее число записей при пагинации
 )
 
 
@@ -87,5 +120,20 @@ app.include_router(router_prices)
 app.include_router(router_alerts)
 
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+async def metrics():
+    return {
+        "http": http_clients.stats(),
+        "db_pool": pool_stats(),
+        "quote_cache": quote_cache.stats(),
+        "auth_tokens": token_verifier.stats(),
+        "password_hashing": password_hasher.stats(),
+        "alert_index": alert_index.stats(),
+        "stock_search": search_index.stats(),
+        "price_events": price_events.stats(),
+        "push_targets": push_targets.stats(),
+    }
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", reload=True, port=8000)
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.core.config import settings
+
+
+@dataclass
+class HashMetrics:
+    calls: int = 0
+    rejected: int = 0
+    pending: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    hash_time_total: float = 0.0
+    hash_time_max: float = 0.0
+
+    def snapshot(self) -> dict:
+        data = asdict(self)
+        data["queue_wait_avg"] = self.queue_wait_total / self.calls if self.calls else 0.0
+        data["hash_time_avg"] = self.hash_time_total / self.calls if self.calls else 0.0
+        return data
+
+
+class PasswordHasher:
+    """
+    bcrypt вне event loop: хэширование и проверка идут в отдельном ограниченном
+    пуле потоков (bcrypt отпускает GIL), поэтому пачка логинов не тормозит
+    остальные запросы. Если очередь переполнена — сразу 503, а не ожидание.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.max_pending = max_pending
+        self.metrics = HashMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self.context.verify, password, hashed)
+
+    async def _run(self, fn, *args):
+        metrics = self.metrics
+        if metrics.pending >= self.max_pending:
+            metrics.rejected += 1
+            raise HTTPException(status_code=503, detail="Сервис перегружен, повторите попытку позже")
+
+        submitted = time.perf_counter()
+        timings = {}
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings["wait"] = started - submitted
+                timings["hash"] = time.perf_counter() - started
+
+        metrics.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            metrics.pending -= 1
+            if timings:
+                metrics.calls += 1
+                metrics.queue_wait_total += timings["wait"]
+                metrics.queue_wait_max = max(metrics.queue_wait_max, timings["wait"])
+                metrics.hash_time_total += timings["hash"]
+                metrics.hash_time_max = max(metrics.hash_time_max, timings["hash"])
+
+    def stats(self) -> dict:
+        return self.metrics.snapshot()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -2,13 +2,14 @@ from fastapi import HTTPException
 from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 import jwt
 
 from src.modules.auth.models import RefreshToken
 from src.modules.auth.schemas import TokenPair
+from src.modules.auth.hashing import password_hasher
 from src.modules.auth.repository import AuthRepository
+from src.modules.auth.tokens import token_verifier
 from src.core.config import settings
 from src.modules.users.repository import UserRepository
 from src.modules.users.schemas import (
@@ -23,15 +24,14 @@ class AuthService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.repo = UserRepository(session)
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
         self.auth_repo = AuthRepository(session)
 
-    def _hash_password(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def _hash_password(self, password: str) -> str:
+        return await password_hasher.hash(password)
 
 
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
 
 
     def _create_access_token(self, data: dict) -> str:
@@ -49,12 +49,7 @@ class AuthService:
 
 
     def _decode_token(self, token: str) -> dict:
-        try:
-            return jwt.decode(token, key=settings.JWT_SECRET_KEY, algorithms=["HS256"])
-        except jwt.ExpiredSignatureError:
-            raise HTTPException(status_code=401, detail="Срок действия токена истёк")
-        except (jwt.DecodeError, jwt.InvalidTokenError):
-            raise HTTPException(status_code=401, detail="Невалидный токен")
+        return token_verifier.decode(token)
 
 
     async def register_user(self, data: UserRequestAdd) -> User:
@@ -63,7 +58,7 @@ class AuthService:
             raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
 
         try:
-            hashed_pwd = self._hash_password(data.password)
+            hashed_pwd = await self._hash_password(data.password)
             user_in = UserAdd(
                 email=data.email,
                 nickname=data.nickname,
@@ -88,7 +83,7 @@ class AuthService:
 
     async def login_user(self, email: str, password: str) -> TokenPair:
         user = await self.repo.get_user_with_hashed_password(email)
-        if not user or not self._verify_password(password, user.hashed_password):
+        if not user or not await self._verify_password(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Неверный логин или пароль")
 
         access_token = self._create_access_token({"user_id": user.id})
@@ -0,0 +1,71 @@
+import time
+from collections import OrderedDict
+
+import jwt
+from fastapi import HTTPException
+
+from src.core.config import settings
+
+
+class TokenVerifier:
+    """
+    Проверка access-токенов без обращения к БД.
+
+    Недавно проверенные токены хранятся в LRU по подписи: повторный запрос
+    с тем же токеном не пересчитывает HMAC и не разбирает JSON. Запись живёт
+    не дольше ``exp`` самого токена.
+    """
+
+    def __init__(self, secret: str, algorithms: list[str], maxsize: int):
+        self.secret = secret
+        self.algorithms = algorithms
+        self.maxsize = maxsize
+        self._cache: OrderedDict[str, tuple[str, dict, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(token, key=self.secret, algorithms=self.algorithms)
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Срок действия токена истёк")
+        except (jwt.DecodeError, jwt.InvalidTokenError):
+            raise HTTPException(status_code=401, detail="Невалидный токен")
+
+    def verify(self, token: str) -> dict:
+        signature = token.rpartition(".")[2]
+        cached = self._cache.get(signature)
+        if cached is not None:
+            cached_token, payload, exp = cached
+            # Сверяем токен целиком: подпись — только ключ поиска
+            if cached_token == token and exp > time.time():
+                self._cache.move_to_end(signature)
+                self.hits += 1
+                return payload
+            del self._cache[signature]
+
+        self.misses += 1
+        payload = self.decode(token)
+
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            self._cache[signature] = (token, payload, float(exp))
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return payload
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+token_verifier = TokenVerifier(
+    secret=settings.JWT_SECRET_KEY,
+    algorithms=[settings.JWT_ALGORITHM],
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+)
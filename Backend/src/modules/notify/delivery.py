@@ -0,0 +1,146 @@
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable
+
+from src.core.config import settings
+from src.modules.notify.onesignal import MAX_SUBSCRIPTIONS_PER_NOTIFICATION, OneSignalClient, onesignal
+
+
+@dataclass
+class PushItem:
+    alert_id: int
+    player_id: str
+    text: str
+    date: datetime
+    subscription_id: str | None = None
+
+
+@dataclass
+class DeliveryReport:
+    total: int = 0
+    delivered: list[tuple[int, datetime]] = field(default_factory=list)  # (alert_id, triggered_at)
+    no_subscription: int = 0
+    failed: int = 0
+    lookups: int = 0
+    # Заново запрошенные подписки (player_id -> subscription_id) — вызывающий сохраняет их
+    resolved: dict[str, str | None] = field(default_factory=dict)
+    notifications: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> str:
+        return (f"{len(self.delivered)}/{self.total} доставлено, уведомлений {self.notifications}, "
+                f"запросов подписок {self.lookups}, без подписки {self.no_subscription}, "
+                f"ошибок {self.failed}, {self.elapsed:.2f}s")
+
+
+async def run_workers(jobs: Iterable, handler: Callable[..., Awaitable[None]], workers: int) -> None:
+    # Не больше workers задач одновременно; ошибка одной задачи не останавливает остальные
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    async def worker():
+        while True:
+            try:
+                job = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await handler(job)
+            except Exception as e:
+                print(f"[!] Ошибка доставки push: {e}")
+            finally:
+                queue.task_done()
+
+    await asyncio.gather(*(worker() for _ in range(min(workers, queue.qsize()))))
+
+
+# Доставка алертов: подписки запрашиваются только при отсутствии сохранённых,
+# одинаковые тексты уходят одним уведомлением. В БД не пишет — report.resolved
+# сохраняет вызывающий
+class PushDelivery:
+    def __init__(self, client: OneSignalClient | None = None, workers: int | None = None,
+                 batch_size: int = MAX_SUBSCRIPTIONS_PER_NOTIFICATION):
+        self.client = client or onesignal
+        self.workers = workers or settings.PUSH_WORKERS
+        self.batch_size = min(batch_size, MAX_SUBSCRIPTIONS_PER_NOTIFICATION)
+
+    async def deliver(self, items: list[PushItem]) -> DeliveryReport:
+        started = time.perf_counter()
+        report = DeliveryReport(total=len(items))
+        if not items:
+            return report
+
+        # 1. subscription_id — только для тех, у кого его ещё нет
+        await self._resolve([i for i in items if not i.subscription_id], report)
+
+        # 2. Отправка; получатели, отклонённые OneSignal, — кандидаты на повтор
+        ready = [i for i in items if i.subscription_id]
+        report.no_subscription = len(items) - len(ready)
+        stale = await self._send(ready, report)
+
+        # 3. Сохранённая подписка устарела: перезапрашиваем и отправляем ещё раз
+        retry = [i for i in stale if i.player_id not in report.resolved]
+        report.failed += len(stale) - len(retry)
+        if retry:
+            for item in retry:
+                item.subscription_id = None
+            await self._resolve(retry, report)
+            resend = [i for i in retry if i.subscription_id]
+            report.no_subscription += len(retry) - len(resend)
+            report.failed += len(await self._send(resend, report))
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    async def _resolve(self, items: list[PushItem], report: DeliveryReport) -> None:
+        # Один запрос на уникальный player_id
+        async def lookup(player_id: str):
+            report.resolved[player_id] = await self.client.get_subscription_id(player_id)
+
+        player_ids = list(dict.fromkeys(i.player_id for i in items))
+        report.lookups += len(player_ids)
+        await run_workers(player_ids, lookup, self.workers)
+
+        for item in items:
+            item.subscription_id = report.resolved.get(item.player_id)
+
+    async def _send(self, items: list[PushItem], report: DeliveryReport) -> list[PushItem]:
+        # Возвращает получателей, которых OneSignal отклонил
+        by_text: dict[str, list[PushItem]] = defaultdict(list)
+        for item in items:
+            by_text[item.text].append(item)
+
+        batches = []
+        for text, group in by_text.items():
+            for i in range(0, len(group), self.batch_size):
+                batches.append((text, group[i:i + self.batch_size]))
+
+        rejected = []
+
+        async def send(batch: tuple[str, list[PushItem]]):
+            text, group = batch
+            sub_ids = list(dict.fromkeys(i.subscription_id for i in group))
+            result = await self.client.send(
+                sub_ids,
+                headings={"ru": "Сработал алерт", "en": "Price Alert"},
+                contents={"ru": text, "en": text},
+                ttl=3600,  # ⏳ гарантирует доставку, если оффлайн
+            )
+            report.notifications += 1
+            if not result.ok:
+                report.failed += len(group)
+                return
+
+            invalid = set(result.invalid_ids)
+            for item in group:
+                if item.subscription_id in invalid:
+                    rejected.append(item)
+                else:
+                    report.delivered.append((item.alert_id, item.date))
+
+        await run_workers(batches, send, self.workers)
+        return rejected
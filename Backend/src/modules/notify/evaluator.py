@@ -0,0 +1,67 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.database import jobs_session_maker
+from src.core.events import PriceEvent, PriceEventBus, price_events
+from src.modules.notify.index import alert_index
+from src.modules.notify.service import AlertService
+
+
+class AlertEvaluator:
+    """
+    Потребитель событий новой цены: проверяет алерты только изменившихся акций,
+    как только их данные зафиксированы, не дожидаясь конца синхронизации всего режима.
+    """
+
+    def __init__(
+        self,
+        bus: PriceEventBus = price_events,
+        session_maker: async_sessionmaker = jobs_session_maker,
+        max_batch: int = 500,
+    ):
+        self.bus = bus
+        self.session_maker = session_maker
+        self.max_batch = max_batch
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        print("[i] Вычислитель алертов запущен")
+        while True:
+            # Ждём первое событие, остальные накопившиеся забираем без ожидания
+            events = [await self.bus.get()]
+            while len(events) < self.max_batch:
+                event = self.bus.get_nowait()
+                if event is None:
+                    break
+                events.append(event)
+
+            try:
+                await self.evaluate(events)
+            except Exception as e:
+                print(f"[!] Ошибка проверки алертов: {e}")
+
+    async def evaluate(self, events: list[PriceEvent]) -> None:
+        # Сессию открываем, только если по индексу что-то сработало
+        hits = [e for e in events if alert_index.match(e.stock_id, e.close)]
+        if not hits:
+            return
+
+        async with self.session_maker() as session:
+            await AlertService(session).check_prices(hits)
+
+
+alert_evaluator = AlertEvaluator()
@@ -0,0 +1,107 @@
+"""
+Индекс порогов активных алертов в памяти процесса.
+
+Индекс не разделяется между процессами: при нескольких воркерах uvicorn
+алерт, созданный в одном воркере, не попадёт в индекс другого до его
+перестроения. Рассчитано на один процесс API (как и ``src.core.events``).
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class IndexedAlert:
+    alert_id: int
+    user_id: int
+    stock_id: int
+    condition: str
+    value: float
+
+
+@dataclass
+class _Thresholds:
+    """Пороги одной стороны (above/below) одной акции, отсортированные по (value, alert_id)."""
+
+    keys: list[tuple[float, int]] = field(default_factory=list)
+    alerts: list[IndexedAlert] = field(default_factory=list)
+
+    def add(self, alert: IndexedAlert) -> None:
+        key = (alert.value, alert.alert_id)
+        i = bisect_left(self.keys, key)
+        self.keys.insert(i, key)
+        self.alerts.insert(i, alert)
+
+    def remove(self, alert: IndexedAlert) -> None:
+        key = (alert.value, alert.alert_id)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            del self.alerts[i]
+
+
+class AlertIndex:
+    """
+    Активные алерты в памяти: по каждой акции отдельные отсортированные массивы
+    порогов "above" и "below". Сработавшие при новой цене находятся бинарным
+    поиском за O(log n + k), без просмотра всех алертов.
+    """
+
+    def __init__(self):
+        self._above: dict[int, _Thresholds] = {}
+        self._below: dict[int, _Thresholds] = {}
+        self._by_id: dict[int, IndexedAlert] = {}
+        self.is_built = False
+
+    def rebuild(self, alerts: list[IndexedAlert]) -> None:
+        self._above.clear()
+        self._below.clear()
+        self._by_id.clear()
+        for alert in sorted(alerts, key=lambda a: (a.value, a.alert_id)):
+            self.add(alert)
+        self.is_built = True
+
+    def add(self, alert: IndexedAlert) -> None:
+        if alert.alert_id in self._by_id:
+            self.remove(alert.alert_id)
+        sides = self._above if alert.condition == "above" else self._below
+        sides.setdefault(alert.stock_id, _Thresholds()).add(alert)
+        self._by_id[alert.alert_id] = alert
+
+    def remove(self, alert_id: int) -> None:
+        alert = self._by_id.pop(alert_id, None)
+        if alert is None:
+            return
+        sides = self._above if alert.condition == "above" else self._below
+        thresholds = sides.get(alert.stock_id)
+        if thresholds:
+            thresholds.remove(alert)
+            if not thresholds.keys:
+                del sides[alert.stock_id]
+
+    def match(self, stock_id: int, close: float) -> list[IndexedAlert]:
+        matched = []
+
+        # "above" срабатывает при close >= value: все пороги не выше цены
+        above = self._above.get(stock_id)
+        if above:
+            matched.extend(above.alerts[:bisect_right(above.keys, (close, float("inf")))])
+
+        # "below" срабатывает при close <= value: все пороги не ниже цены
+        below = self._below.get(stock_id)
+        if below:
+            matched.extend(below.alerts[bisect_left(below.keys, (close, float("-inf"))):])
+
+        return matched
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def stats(self) -> dict:
+        return {
+            "alerts": len(self._by_id),
+            "stocks": len(self._above.keys() | self._below.keys()),
+            "built": self.is_built,
+        }
+
+
+alert_index = AlertIndex()
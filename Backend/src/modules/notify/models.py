@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, text
 from datetime import datetime
 
 from src.core.database import Base
@@ -9,6 +9,10 @@ class Alert(Base):
     __tablename__ = "alerts"
     __table_args__ = (
         UniqueConstraint("user_id", "stock_id", "condition", "value", name="uix_user_stock_cond_val"),
+        # Проверка алертов читает только активные — частичный индекс по акции.
+        # На существующей БД (create_all его не добавит):
+        #   CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_active_stock ON alerts (stock_id) WHERE is_active;
+        Index("ix_alerts_active_stock", "stock_id", postgresql_where=text("is_active")),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
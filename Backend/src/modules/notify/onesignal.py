@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+
+from src.core.config import settings
+from src.core.http_client import HttpClientRegistry, http_clients
+
+
+# Ограничение OneSignal на число получателей в одном уведомлении — 20 000
+MAX_SUBSCRIPTIONS_PER_NOTIFICATION = 20000
+
+
+@dataclass
+class PushResult:
+    ok: bool
+    status_code: int
+    notification_id: str | None = None
+    # Получатели, которых OneSignal отклонил (невалидные/отписанные subscription_id)
+    invalid_ids: tuple[str, ...] = ()
+
+
+class OneSignalClient:
+    """
+    Тонкая обёртка над OneSignal API v2. Базовый URL берётся из настроек —
+    для проверок его можно направить на локальный фейковый сервер.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        app_id: str | None = None,
+        api_key: str | None = None,
+        http: HttpClientRegistry = http_clients,
+    ):
+        self.base_url = (base_url or settings.ONESIGNAL_API_URL).rstrip("/")
+        self.app_id = app_id or settings.PROJECT_ID
+        self.headers = {"Authorization": f"Bearer {api_key or settings.ONESIGNAL_API_KEY}"}
+        self.http = http
+
+    async def get_subscriptions(self, player_id: str) -> list[dict] | None:
+        """Подписки пользователя по onesignal_id; None — если OneSignal не ответил 200."""
+        url = f"{self.base_url}/apps/{self.app_id}/users/by/onesignal_id/{player_id}"
+        resp = await self.http.get(url, headers=self.headers)
+        if resp.status_code != 200:
+            return None
+        return resp.json().get("subscriptions") or []
+
+    async def get_subscription_id(self, player_id: str) -> str | None:
+        subs = await self.get_subscriptions(player_id)
+        # ❗ Берём только активный subscription
+        return next((s["id"] for s in subs or [] if s.get("enabled")), None)
+
+    async def send(self, subscription_ids: list[str], headings: dict, contents: dict, ttl: int | None = None) -> PushResult:
+        body = {
+            "app_id": self.app_id,
+            "include_subscription_ids": subscription_ids,
+            "headings": headings,
+            "contents": contents,
+        }
+        if ttl is not None:
+            body["ttl"] = ttl
+
+        resp = await self.http.post(f"{self.base_url}/notifications?c=push", headers=self.headers, json=body)
+        if resp.status_code >= 400:
+            return PushResult(ok=False, status_code=resp.status_code)
+
+        data = resp.json()
+        errors = data.get("errors")
+        if isinstance(errors, dict):
+            invalid = errors.get("invalid_player_ids", [])
+        elif errors and not data.get("id"):
+            # "All included players are not subscribed" — не дошло ни одному получателю
+            invalid = subscription_ids
+        else:
+            invalid = []
+        return PushResult(
+            ok=True,
+            status_code=resp.status_code,
+            notification_id=data.get("id"),
+            invalid_ids=tuple(invalid),
+        )
+
+
+onesignal = OneSignalClient()
@@ -1,9 +1,20 @@
-from sqlalchemy import select
+from datetime import datetime
+from sqlalchemy import DateTime, Float, Integer, and_, column, or_, select, text, update, values
 
 from src.core.repository import BaseRepository
 from src.modules.notify.models import Alert
 from src.modules.stocks.models import Stock
-from src.modules.notify.schemas import AlertOut
+from src.modules.notify.schemas import AlertOut, TriggeredAlert
+from src.modules.stock_prices.schemas import StockPriceOut
+
+
+CLAIM_ALERTS_SQL = """
+    UPDATE alerts AS a
+    SET is_active = false, triggered_at = v.triggered_at
+    FROM unnest(CAST(:ids AS INTEGER[]), CAST(:dates AS TIMESTAMP[])) AS v(id, triggered_at)
+    WHERE a.id = v.id AND a.is_active
+    RETURNING a.id
+"""
 
 
 class AlertRepository(BaseRepository):
@@ -46,6 +57,68 @@ class AlertRepository(BaseRepository):
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def get_active_stock_ids(self) -> list[int]:
+        query = select(self.model.stock_id).where(self.model.is_active == True).distinct()
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_triggered(self, latest: dict[int, StockPriceOut]) -> list[TriggeredAlert]:
+        """
+        Сработавшие алерты одним запросом: последние цены (по одной на акцию)
+        передаются списком VALUES и сравниваются с порогами прямо в SQL.
+        """
+        if not latest:
+            return []
+
+        prices = values(
+            column("stock_id", Integer), column("close", Float), column("date", DateTime),
+            name="prices",
+        ).data([(stock_id, p.close, p.date) for stock_id, p in latest.items()])
+
+        query = (
+            select(
+                self.model.id.label("alert_id"),
+                self.model.user_id,
+                self.model.stock_id,
+                self.model.condition,
+                self.model.value,
+                prices.c.close,
+                prices.c.date,
+            )
+            .join(prices, and_(
+                self.model.stock_id == prices.c.stock_id,
+                self.model.is_active == True,
+                or_(
+                    and_(self.model.condition == "above", prices.c.close >= self.model.value),
+                    and_(self.model.condition == "below", prices.c.close <= self.model.value),
+                ),
+            ))
+        )
+        result = await self.session.execute(query)
+        return [TriggeredAlert.model_validate(row) for row in result.mappings().all()]
+
+    async def claim(self, triggered: list[tuple[int, datetime]]) -> set[int]:
+        """
+        Атомарно забирает сработавшие алерты: деактивирует только ещё активные
+        и возвращает их id. Алерт, уже забранный другой проверкой, сюда не попадёт,
+        поэтому один и тот же push не уйдёт дважды.
+        """
+        if not triggered:
+            return set()
+        ids, dates = zip(*triggered)
+        result = await self.session.execute(text(CLAIM_ALERTS_SQL), {"ids": list(ids), "dates": list(dates)})
+        return set(result.scalars().all())
+
+    async def release(self, alert_ids: list[int]) -> None:
+        """Возвращает в работу забранные, но не доставленные алерты."""
+        if not alert_ids:
+            return
+        await self.session.execute(
+            update(self.model)
+            .where(self.model.id.in_(alert_ids))
+            .values(is_active=True, triggered_at=None)
+        )
+
     async def get_player_id(self, user_id: int) -> str | None:
         query = select(self.model.player_id).where(self.model.user_id == user_id)
         result = await self.session.execute(query)
@@ -17,6 +17,16 @@ class AlertUpdate(BaseModel):
     triggered_at: datetime | None = None
 
 
+class TriggeredAlert(BaseModel):
+    alert_id: int
+    user_id: int
+    stock_id: int
+    condition: str
+    value: float
+    close: float
+    date: datetime
+
+
 class AlertOut(AlertBase):
     id: int
     is_active: bool
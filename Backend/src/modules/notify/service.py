@@ -1,15 +1,18 @@
 from fastapi import HTTPException
-import httpx
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.events import PriceEvent
 from src.modules.stocks.repository import StockRepository
+from src.modules.notify.delivery import DeliveryReport, PushDelivery, PushItem
+from src.modules.notify.index import IndexedAlert, alert_index
 from src.modules.notify.repository import AlertRepository
-from src.modules.notify.schemas import AlertCreate, AlertUpdate
+from src.modules.notify.schemas import AlertCreate, AlertUpdate, TriggeredAlert
+from src.modules.notify.subscriptions import PushTarget, push_targets
+from src.modules.stock_prices.cache import quote_cache
 from src.modules.stock_prices.repository import StockPriceRepository
 from src.modules.stocks.models import Stock
 from src.modules.users.repository import OneSignalTokenRepository
-from src.core.config import settings
 
 
 class AlertService:
@@ -46,7 +49,9 @@ class AlertService:
         # await self.session.commit()
         # await self.session.refresh(alert_in)
 
-        return await self.repo.create_alert(user_id, data.stock_id, data.condition, data.value)
+        alert = await self.repo.create_alert(user_id, data.stock_id, data.condition, data.value)
+        alert_index.add(self._to_indexed(alert))
+        return alert
         # return alert_in
 
     async def list_alerts(self, user_id: int, stock_id: int | None = None, page: int = 1, page_size: int = 20):
@@ -56,75 +61,119 @@ class AlertService:
         await self.repo.edit(AlertUpdate(is_active=False), id=alert_id, user_id=user_id)
 
         await self.session.commit()
+        alert_index.remove(alert_id)
+
+    # === Индекс порогов ===
+    async def rebuild_index(self) -> None:
+        alerts = await self.repo.get_all_active()
+        alert_index.rebuild([self._to_indexed(a) for a in alerts])
+
+    @staticmethod
+    def _to_indexed(alert) -> IndexedAlert:
+        return IndexedAlert(
+            alert_id=alert.id,
+            user_id=alert.user_id,
+            stock_id=alert.stock_id,
+            condition=alert.condition,
+            value=alert.value,
+        )
 
     # === Фоновая проверка ===
     async def check_all(self):
         """Проверяем все активные алерты, отправляем push и деактивируем сработавшие."""
-        alerts = await self.repo.get_all_active()
-
-        for alert in alerts:
-            latest = await self.price_repo.get_latest_by_stock(alert.stock_id)
-            if not latest:
-                continue
-
-            is_triggered = (
-                (alert.condition == "above" and latest.close >= alert.value) or
-                (alert.condition == "below" and latest.close <= alert.value)
+        # Последняя цена — один раз на акцию, из кэша котировок (промахи одним запросом)
+        stock_ids = await self.repo.get_active_stock_ids()
+        quotes = await quote_cache.load(self.price_repo, stock_ids)
+        triggered = await self.repo.get_triggered({sid: q.latest for sid, q in quotes.items()})
+        await self._deliver(triggered)
+
+    async def check_prices(self, events: list[PriceEvent]):
+        """Проверка алертов по новым ценам через индекс порогов — без запросов к alerts."""
+        triggered = [
+            TriggeredAlert(
+                alert_id=a.alert_id,
+                user_id=a.user_id,
+                stock_id=a.stock_id,
+                condition=a.condition,
+                value=a.value,
+                close=e.close,
+                date=e.date,
             )
-            if not is_triggered:
-                continue
-
-            # print(f"stock_id {alert.stock_id}")
-            success = await self._send_push(alert.user_id, alert.stock_id, latest.close)
-            if success:
-                await self.repo.edit(AlertUpdate(is_active=False, triggered_at=latest.date), id=alert.id)
-                await self.session.commit()
-
-    # === Internal === 
-    async def _send_push(self, user_id: int, stock_id: int, price: float) -> bool:
-        # Получить player_id
-        player_id = await self.onesignal_repo.get_player_id(user_id)
-        if not player_id:
-            return False
-
-        async with httpx.AsyncClient() as client:
-            # Получить subscription_id по player_id
-            url = f"https://api.onesignal.com/apps/{settings.PROJECT_ID}/users/by/onesignal_id/{player_id}"
-            headers = {"Authorization": f"Bearer {settings.ONESIGNAL_API_KEY}"}
-            resp = await client.get(url, headers=headers)
-
-            # print(f"settings.PROJECT_ID {settings.PROJECT_ID}")
-            # print(f"resp.text {resp.text}")
-            if resp.status_code != 200:
-                return False
-
-            subs = resp.json().get("subscriptions") or []
-            # ❗ Берём только активный subscription
-            sub_id = next((s["id"] for s in subs if s.get("enabled")), None)
-            if not sub_id:
-                return False
-
-            # Получаем тикер по stock_id
-            symbol = await self.stock_repo.get_symbol_by_id(stock_id)
-            if not symbol:
-                symbol = f"id {stock_id}"
-
-            text_ru = f"Цена актива {symbol} достигла {price}₽"
-
-            # Отправка push
-            push_url = "https://api.onesignal.com/notifications?c=push"
-            push_headers = {
-                "Authorization": f"Bearer {settings.ONESIGNAL_API_KEY}",
-                "Content-Type": "application/json",
-            }
-            body = {
-                "app_id": settings.PROJECT_ID,
-                "include_subscription_ids": [sub_id],
-                "headings": {"ru": "Сработал алерт", "en": "Price Alert"},
-                "contents": {"ru": text_ru, "en": text_ru},
-                "ttl": 3600  # ⏳ гарантирует доставку, если оффлайн
-            }
-
-            result = await client.post(push_url, headers=push_headers, json=body)
-            # print(result.status_code, result.text)
-            return result.status_code < 400
+            for e in events
+            for a in alert_index.match(e.stock_id, e.close)
+        ]
+        await self._deliver(triggered)
+
+    # === Internal ===
+    async def _deliver(self, triggered: list[TriggeredAlert]) -> DeliveryReport | None:
+        if not triggered:
+            return None
+
+        # Без токена OneSignal push не отправить: такие алерты не забираем, они остаются активными.
+        # player_id с подпиской — из кэша (промахи одним запросом)
+        targets = await push_targets.load(self.onesignal_repo, list({a.user_id for a in triggered}))
+        triggered = [a for a in triggered if a.user_id in targets]
+        if not triggered:
+            return None
+
+        # Сначала забираем алерты: параллельные проверки (события, сверка, ручной запуск)
+        # получат каждый алерт только один раз
+        claimed = await self.repo.claim(list({a.alert_id: a.date for a in triggered}.items()))
+        await self.session.commit()
+        # Не забранные уже неактивны (их забрала другая проверка) — из индекса убираем и их
+        for alert_id in {a.alert_id for a in triggered}:
+            alert_index.remove(alert_id)
+        triggered = [a for a in triggered if a.alert_id in claimed]
+        if not triggered:
+            return None
+
+        try:
+            report = await self._push(triggered, targets)
+        except Exception:
+            # Иначе забранные алерты остались бы неактивными без отправленного push
+            await self.session.rollback()
+            await self._release(triggered)
+            raise
+
+        # Недоставленные возвращаем в работу — их подхватит следующая проверка
+        delivered = {alert_id for alert_id, _ in report.delivered}
+        await self._release([a for a in triggered if a.alert_id not in delivered])
+        return report
+
+    async def _push(self, triggered: list[TriggeredAlert], targets: dict[int, PushTarget]) -> DeliveryReport:
+        # Тикеры — одним запросом
+        symbols = await self.stock_repo.get_symbols_by_ids(list({a.stock_id for a in triggered}))
+
+        items = []
+        for alert in triggered:
+            target = targets[alert.user_id]
+            symbol = symbols.get(alert.stock_id) or f"id {alert.stock_id}"
+            items.append(PushItem(
+                alert_id=alert.alert_id,
+                player_id=target.player_id,
+                text=f"Цена актива {symbol} достигла {alert.close}₽",
+                date=alert.date,
+                subscription_id=target.subscription_id,
+            ))
+
+        report = await PushDelivery().deliver(items)
+        print(f"[i] Алерты: {report.summary()}")
+
+        # Заново полученные подписки — в кэш и в onesignal_tokens (коммит — вместе с возвратом алертов)
+        for user_id, target in targets.items():
+            if target.player_id in report.resolved:
+                push_targets.put(user_id, PushTarget(target.player_id, report.resolved[target.player_id]))
+        await self.onesignal_repo.set_subscription_ids(report.resolved)
+        return report
+
+    async def _release(self, alerts: list[TriggeredAlert]) -> None:
+        await self.repo.release(list({a.alert_id for a in alerts}))
+        await self.session.commit()
+        for alert in alerts:
+            alert_index.add(IndexedAlert(
+                alert_id=alert.alert_id,
+                user_id=alert.user_id,
+                stock_id=alert.stock_id,
+                condition=alert.condition,
+                value=alert.value,
+            ))
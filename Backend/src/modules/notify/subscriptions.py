@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+
+from src.core.config import settings
+from src.modules.users.repository import OneSignalTokenRepository
+
+
+@dataclass(frozen=True)
+class PushTarget:
+    player_id: str
+    subscription_id: str | None
+
+
+class PushTargetCache:
+    """
+    player_id и подписка OneSignal по user_id в памяти процесса.
+
+    Источник — onesignal_tokens: промахи догружаются одним запросом через ``load``.
+    Обновляется при регистрации токена и при отказе доставки.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[int, PushTarget] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> PushTarget | None:
+        target = self._cache.get(user_id)
+        if target is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return target
+
+    def put(self, user_id: int, target: PushTarget) -> None:
+        self._cache[user_id] = target
+
+    def invalidate(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+
+    async def load(self, repo: OneSignalTokenRepository, user_ids: list[int]) -> dict[int, PushTarget]:
+        found = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            target = self.get(user_id)
+            if target is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = target
+
+        if missing:
+            for user_id, (player_id, sub_id) in (await repo.get_push_targets(missing)).items():
+                target = PushTarget(player_id, sub_id)
+                self.put(user_id, target)
+                found[user_id] = target
+        return found
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+push_targets = PushTargetCache(maxsize=settings.PUSH_TARGET_CACHE_SIZE, ttl=settings.PUSH_TARGET_CACHE_TTL)
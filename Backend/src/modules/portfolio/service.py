@@ -5,6 +5,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import delete, update as sqlalchemy_update
 
 from src.modules.portfolio.models import PortfolioTransaction
+from src.modules.stock_prices.cache import quote_cache
 from src.modules.stock_prices.repository import StockPriceRepository
 from src.modules.stocks.repository import StockRepository
 from src.modules.portfolio.repository import PortfolioRepository
@@ -24,18 +25,17 @@ class PortfolioService:
 
         stock_ids = [i.stock_id for i in items]
         stocks = await self.stock_repo.get_by_ids(stock_ids)
-        prices_by_stock = await self.price_repo.get_latest_map(stock_ids)
-        closes_map = await self.price_repo.get_last_closes_map(stock_ids, n=10)
+        quotes = await quote_cache.load(self.price_repo, stock_ids)
 
         stock_map = {s.id: s for s in stocks}
         output = []
 
         for item in items:
             stock = stock_map.get(item.stock_id)
-            price_data = prices_by_stock.get(item.stock_id, [])
-            price = price_data[0].close if price_data else None
+            quote = quotes.get(item.stock_id)
+            price = quote.latest.close if quote else None
 
-            closes = closes_map.get(item.stock_id, [])
+            closes = quote.closes if quote else []
 
             change = "0"
             change_rub = 0.0
@@ -77,10 +77,9 @@ class PortfolioService:
 
         stocks = await self.stock_repo.get_by_ids([item.stock_id])
         stock = stocks[0] if stocks else None
-        price_data = await self.price_repo.get_latest_by_stock(item.stock_id)
-        closes = await self.price_repo.get_last_closes_map([item.stock_id], n=10)
-
-        closes_list = closes.get(item.stock_id, [])
+        quote = (await quote_cache.load(self.price_repo, [item.stock_id])).get(item.stock_id)
+        price_data = quote.latest if quote else None
+        closes_list = quote.closes if quote else []
 
         change = "0"
         change_rub = 0.0
@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+
+from src.core.config import settings
+from src.modules.stock_prices.repository import StockPriceRepository
+from src.modules.stock_prices.schemas import StockPriceOut
+
+
+CLOSES_DEPTH = 10
+
+
+@dataclass
+class CachedQuote:
+    latest: StockPriceOut
+    closes: list[float]  # от новой свечи к старой, не больше CLOSES_DEPTH
+
+
+class LatestQuoteCache:
+    """
+    Последняя свеча и последние закрытия по stock_id в памяти процесса.
+
+    Прогревается синхронизацией после каждого коммита, промахи читатели
+    догружают одним запросом через ``load``. Записи живут ``ttl`` секунд.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[int, CachedQuote] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, stock_id: int) -> CachedQuote | None:
+        quote = self._cache.get(stock_id)
+        if quote is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return quote
+
+    def put(self, stock_id: int, quote: CachedQuote) -> None:
+        self._cache[stock_id] = quote
+
+    def invalidate(self, stock_id: int) -> None:
+        self._cache.pop(stock_id, None)
+
+    async def load(self, repo: StockPriceRepository, stock_ids: list[int]) -> dict[int, CachedQuote]:
+        found = {}
+        missing = []
+        for stock_id in dict.fromkeys(stock_ids):
+            quote = self.get(stock_id)
+            if quote is None:
+                missing.append(stock_id)
+            else:
+                found[stock_id] = quote
+
+        if missing:
+            found.update(await self.refresh(repo, missing))
+        return found
+
+    async def refresh(self, repo: StockPriceRepository, stock_ids: list[int]) -> dict[int, CachedQuote]:
+        rows_by_stock = await repo.get_latest_map(stock_ids, per_stock=CLOSES_DEPTH)
+        loaded = {}
+        for stock_id, rows in rows_by_stock.items():
+            if not rows:
+                continue
+            quote = CachedQuote(
+                latest=StockPriceOut.model_validate(rows[0], from_attributes=True),
+                closes=[r.close for r in rows],
+            )
+            self.put(stock_id, quote)
+            loaded[stock_id] = quote
+        return loaded
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+quote_cache = LatestQuoteCache(maxsize=settings.QUOTE_CACHE_SIZE, ttl=settings.QUOTE_CACHE_TTL)
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
 from datetime import datetime
 
 from src.core.database import Base
@@ -18,3 +19,75 @@ class StockPrice(Base):
     close: Mapped[float] = mapped_column(nullable=False)
     volume: Mapped[float] = mapped_column(nullable=True)
     value: Mapped[float] = mapped_column(nullable=True)
+
+
+class CandleSyncWatermark(Base):
+    """Время последней загруженной свечи по (акция, режим торгов, интервал)."""
+
+    __tablename__ = "candle_sync_watermarks"
+    __table_args__ = (UniqueConstraint("stock_id", "board", "interval", name="uix_watermark_stock_board_interval"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), index=True)
+    board: Mapped[str] = mapped_column(nullable=False)
+    interval: Mapped[int] = mapped_column(nullable=False)
+    last_candle_at: Mapped[datetime] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LatestQuote(Base):
+    """Последняя цена из снимка marketdata ISS — одна строка на акцию."""
+
+    __tablename__ = "latest_quotes"
+
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), primary_key=True)
+    last: Mapped[float] = mapped_column(nullable=False)
+    open: Mapped[float] = mapped_column(nullable=True)
+    high: Mapped[float] = mapped_column(nullable=True)
+    low: Mapped[float] = mapped_column(nullable=True)
+    volume: Mapped[float] = mapped_column(nullable=True)
+    value: Mapped[float] = mapped_column(nullable=True)
+    quoted_at: Mapped[datetime] = mapped_column(nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class BackfillJob(Base):
+    """Задача догрузки истории свечей: ставится через API, выполняется отдельным воркером."""
+
+    __tablename__ = "backfill_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    board: Mapped[str] = mapped_column(nullable=False)
+    from_date: Mapped[str] = mapped_column(nullable=True)  # YYYY-MM-DD
+    till_date: Mapped[str] = mapped_column(nullable=True)  # YYYY-MM-DD
+    symbol: Mapped[str] = mapped_column(nullable=True)
+    # "queued" → "running" → "done" | "failed"
+    status: Mapped[str] = mapped_column(default="queued", index=True)
+    total_stocks: Mapped[int] = mapped_column(default=0)
+    done_stocks: Mapped[int] = mapped_column(default=0)
+    added: Mapped[int] = mapped_column(default=0)
+    # Чекпоинт: полностью загруженные бумаги пропускаются при возобновлении
+    completed_symbols: Mapped[list[str]] = mapped_column(ARRAY(String), default=list)
+    error: Mapped[str] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class StockPriceRollup(Base):
+    """Свечи, свёрнутые из часовых: дневные ("1d") и недельные ("1w")."""
+
+    __tablename__ = "stock_price_rollups"
+    __table_args__ = (
+        UniqueConstraint("stock_id", "resolution", "bucket_start", name="uix_rollup_stock_res_bucket"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"))
+    resolution: Mapped[str] = mapped_column(nullable=False)
+    bucket_start: Mapped[datetime] = mapped_column(nullable=False)
+    open: Mapped[float] = mapped_column(nullable=False)
+    high: Mapped[float] = mapped_column(nullable=False)
+    low: Mapped[float] = mapped_column(nullable=False)
+    close: Mapped[float] = mapped_column(nullable=False)
+    volume: Mapped[float] = mapped_column(nullable=True)
+    value: Mapped[float] = mapped_column(nullable=True)
@@ -0,0 +1,103 @@
+import calendar
+import json
+import math
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+
+EPOCH = datetime(1970, 1, 1)
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume", "value")
+OHLC_COLUMNS = ("open", "high", "low", "close")
+
+
+@dataclass
+class CandleBatch:
+    """
+    Свечи одной бумаги в колоночном виде.
+
+    ``timestamps`` — секунды от эпохи (int64) для наивного московского времени
+    ISS, остальные колонки — массивы float64. Цены OHLC всегда заданы,
+    пропуски volume/value хранятся как NaN.
+    """
+
+    timestamps: array = field(default_factory=lambda: array("q"))
+    open: array = field(default_factory=lambda: array("d"))
+    high: array = field(default_factory=lambda: array("d"))
+    low: array = field(default_factory=lambda: array("d"))
+    close: array = field(default_factory=lambda: array("d"))
+    volume: array = field(default_factory=lambda: array("d"))
+    value: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def extend(self, other: "CandleBatch") -> None:
+        self.timestamps.extend(other.timestamps)
+        for col in OHLCV_COLUMNS:
+            getattr(self, col).extend(getattr(other, col))
+
+    def slice(self, start: int, stop: int) -> "CandleBatch":
+        return CandleBatch(
+            self.timestamps[start:stop],
+            *(getattr(self, col)[start:stop] for col in OHLCV_COLUMNS),
+        )
+
+    @property
+    def first_date(self) -> datetime | None:
+        return to_datetime(min(self.timestamps)) if self.timestamps else None
+
+    @property
+    def last_date(self) -> datetime | None:
+        return to_datetime(max(self.timestamps)) if self.timestamps else None
+
+
+def to_datetime(timestamp: int) -> datetime:
+    return EPOCH + timedelta(seconds=timestamp)
+
+
+@lru_cache(maxsize=8192)
+def _day_epoch(day: str) -> int:
+    return calendar.timegm((int(day[0:4]), int(day[5:7]), int(day[8:10]), 0, 0, 0))
+
+
+def _to_epoch(value: str) -> int:
+    # "YYYY-MM-DD HH:MM:SS" без strptime: дата кэшируется, время считается срезами
+    return _day_epoch(value[:10]) + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+
+
+def _is_number(value) -> bool:
+    return value is not None and not (isinstance(value, float) and math.isnan(value))
+
+
+def _floats(values) -> array:
+    nan = math.nan
+    return array("d", [nan if v is None else v for v in values])
+
+
+def parse_candles_page(raw: bytes) -> CandleBatch:
+    """Разбирает ответ ISS ``candles.json`` сразу в колонки, без промежуточных объектов на строку."""
+    candles = json.loads(raw).get("candles") or {}
+    columns = candles.get("columns") or []
+    if not columns:
+        return CandleBatch()
+
+    # Битые строки (без времени или любой из цен OHLC) отбрасываем до транспонирования:
+    # колонки цен в БД NOT NULL, а NaN в них ломает max/min в свёртках
+    begin_i = columns.index("begin")
+    price_i = [columns.index(col) for col in OHLC_COLUMNS]
+    rows = [
+        r for r in candles.get("data") or []
+        if r[begin_i] and all(_is_number(r[i]) for i in price_i)
+    ]
+    if not rows:
+        return CandleBatch()
+
+    # Транспонируем строки в колонки одним проходом
+    by_column = dict(zip(columns, zip(*rows)))
+
+    return CandleBatch(
+        array("q", map(_to_epoch, by_column["begin"])),
+        *(_floats(by_column[col]) for col in OHLCV_COLUMNS),
+    )
@@ -1,12 +1,100 @@
-from sqlalchemy import select, func, cast, Date, and_
+from sqlalchemy import (
+    BigInteger, Float, Integer, and_, bindparam, column, func, select, text, true, update, values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from collections import defaultdict
-from datetime import date
+from datetime import datetime
 
 from src.core.repository import BaseRepository
-from src.modules.stock_prices.models import StockPrice
-from src.modules.stock_prices.schemas import StockPriceOut
+from src.modules.stock_prices.models import BackfillJob, CandleSyncWatermark, LatestQuote, StockPrice, StockPriceRollup
+from src.modules.stock_prices.parsing import OHLCV_COLUMNS, CandleBatch
+from src.modules.stock_prices.schemas import BackfillJobOut, LatestQuoteOut, StockPriceOut
+
+
+# Колоночная вставка: массивы разворачиваются через unnest, поэтому лимит
+# параметров не действует и размер пачки ограничен только объёмом транзакции
+BATCH_UPSERT_SQL = """
+    INSERT INTO stock_prices (stock_id, date, open, high, low, close, volume, value)
+    SELECT DISTINCT ON (u.ts)
+        CAST(:stock_id AS INTEGER), to_timestamp(u.ts) AT TIME ZONE 'UTC',
+        u.open, u.high, u.low, u.close, NULLIF(u.volume, 'NaN'), NULLIF(u.value, 'NaN')
+    FROM unnest(:timestamps, :open, :high, :low, :close, :volume, :value)
+        AS u(ts, open, high, low, close, volume, value)
+    -- Цены NOT NULL: свечи с NaN в OHLC не пишем (NaN в PostgreSQL больше любого числа)
+    WHERE NULLIF(u.open, 'NaN') IS NOT NULL AND NULLIF(u.high, 'NaN') IS NOT NULL
+      AND NULLIF(u.low, 'NaN') IS NOT NULL AND NULLIF(u.close, 'NaN') IS NOT NULL
+    ORDER BY u.ts
+    ON CONFLICT ON CONSTRAINT uix_stock_date {action}
+    RETURNING xmax = 0
+"""
+BATCH_UPSERT_UPDATE = """DO UPDATE SET
+        open = excluded.open, high = excluded.high, low = excluded.low,
+        close = excluded.close, volume = excluded.volume, value = excluded.value"""
+BATCH_UPSERT_CHUNK_SIZE = 5000
+
+# Каскад свёрток: 1h (stock_prices) → 1d → 1w. Пересчитываются только бакеты,
+# начиная с бакета, в который попала самая ранняя вставленная свеча.
+ROLLUP_SQL = """
+    INSERT INTO stock_price_rollups (stock_id, resolution, bucket_start, open, high, low, close, volume, value)
+    SELECT
+        src.stock_id, :resolution, date_trunc(:unit, src.{date_col}) AS bucket,
+        (array_agg(src.open ORDER BY src.{date_col}))[1],
+        max(src.high), min(src.low),
+        (array_agg(src.close ORDER BY src.{date_col} DESC))[1],
+        sum(src.volume), sum(src.value)
+    FROM {source} AS src
+    WHERE src.stock_id = :stock_id
+      AND src.{date_col} >= date_trunc(:unit, CAST(:since AS TIMESTAMP))
+      {source_filter}
+    GROUP BY src.stock_id, bucket
+    ON CONFLICT ON CONSTRAINT uix_rollup_stock_res_bucket DO UPDATE SET
+        open = excluded.open, high = excluded.high, low = excluded.low,
+        close = excluded.close, volume = excluded.volume, value = excluded.value
+"""
+# Бакетирование истории на стороне PostgreSQL: ntile делит последние :limit
+# свечей на :count равных групп, наружу уходит по одной строке на группу
+BUCKETED_HISTORY_SQL = """
+    WITH recent AS (
+        SELECT date, open, high, low, close, volume, value
+        FROM stock_prices
+        WHERE stock_id = :stock_id
+        ORDER BY date DESC
+        LIMIT :limit
+    ), bucketed AS (
+        SELECT recent.*, ntile(:count) OVER (ORDER BY date) AS bucket
+        FROM recent
+    )
+    SELECT
+        max(date) AS date,
+        (array_agg(open ORDER BY date))[1] AS open,
+        max(high) AS high,
+        min(low) AS low,
+        (array_agg(close ORDER BY date DESC))[1] AS close,
+        coalesce(sum(volume), 0) AS volume,
+        coalesce(sum(value), 0) AS value
+    FROM bucketed
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+UNSEEDED_ROLLUPS_SQL = """
+    SELECT p.stock_id, p.first_date
+    FROM (SELECT stock_id, min(date) AS first_date FROM stock_prices GROUP BY stock_id) AS p
+    LEFT JOIN (
+        SELECT stock_id, min(bucket_start) AS first_bucket
+        FROM stock_price_rollups WHERE resolution = '1d' GROUP BY stock_id
+    ) AS r ON r.stock_id = p.stock_id
+    WHERE CAST(:force AS BOOLEAN) OR r.first_bucket IS NULL OR r.first_bucket > date_trunc('day', p.first_date)
+    ORDER BY p.stock_id
+"""
+ROLLUP_LEVELS = (
+    # (resolution, unit date_trunc, источник, колонка даты, фильтр источника)
+    ("1d", "day", "stock_prices", "date", ""),
+    ("1w", "week", "stock_price_rollups", "bucket_start", "AND src.resolution = '1d'"),
+)
 
 
 class StockPriceRepository(BaseRepository):
@@ -24,6 +112,10 @@ class StockPriceRepository(BaseRepository):
         obj = result.scalars().first()
         return self.schema.model_validate(obj, from_attributes=True) if obj else None
 
+    async def get_first_date(self, stock_id: int) -> datetime | None:
+        stmt = select(func.min(self.model.date)).filter_by(stock_id=stock_id)
+        return await self.session.scalar(stmt)
+
     async def get_history_by_stock(self, stock_id: int, limit: int = 100):
         stmt = (
             select(self.model)
@@ -41,54 +133,79 @@ class StockPriceRepository(BaseRepository):
         result = await self.session.execute(stmt)
         return result.scalars().first() is not None
 
-    async def get_latest_map(self, stock_ids: list[int], per_stock: int = 2):
-        stmt = (
+    def _last_n_per_stock(self, stock_ids: list[int], n: int):
+        # LATERAL ... LIMIT n по индексу uix_stock_date: время не зависит от длины истории
+        ids = values(column("stock_id", Integer), name="ids").data([(i,) for i in stock_ids])
+        last_n = (
             select(self.model)
-            .where(self.model.stock_id.in_(stock_ids))
-            .order_by(self.model.stock_id, self.model.date.desc())
+            .where(self.model.stock_id == ids.c.stock_id)
+            .order_by(self.model.date.desc())
+            .limit(n)
+            .lateral("last_n")
+        )
+        price = aliased(self.model, last_n)
+        return (
+            select(price)
+            .select_from(ids)
+            .join(last_n, true())
+            .order_by(price.stock_id, price.date.desc())
         )
-        result = await self.session.execute(stmt)
-        prices = result.scalars().all()
 
+    async def get_latest_map(self, stock_ids: list[int], per_stock: int = 2):
         grouped = defaultdict(list)
-        for p in prices:
+        if not stock_ids:
+            return grouped
+
+        result = await self.session.execute(self._last_n_per_stock(stock_ids, per_stock))
+        for p in result.scalars().all():
             grouped[p.stock_id].append(p)
-            if len(grouped[p.stock_id]) >= per_stock:
-                continue
 
         return grouped
-    
-    async def bulk_upsert_prices(self, prices: list[StockPrice]) -> int:
-        added = 0
-        for p in prices:
-            stmt = select(self.model).filter_by(stock_id=p.stock_id, date=p.date)
-            result = await self.session.execute(stmt)
-            existing = result.scalars().first()
 
-            if not existing:
-                self.session.add(p)
-                added += 1
+    async def bulk_upsert_batch(
+        self,
+        stock_id: int,
+        batch: CandleBatch,
+        update_existing: bool = False,
+        chunk_size: int = BATCH_UPSERT_CHUNK_SIZE,
+    ) -> int:
+        # Возвращает число новых строк
+        action = BATCH_UPSERT_UPDATE if update_existing else "DO NOTHING"
+        stmt = text(BATCH_UPSERT_SQL.format(action=action)).bindparams(
+            bindparam("timestamps", type_=ARRAY(BigInteger)),
+            *(bindparam(col, type_=ARRAY(Float)) for col in OHLCV_COLUMNS),
+        )
+        inserted = 0
 
-        return added
+        for start in range(0, len(batch), chunk_size):
+            chunk = batch.slice(start, start + chunk_size)
+            params = {"stock_id": stock_id, "timestamps": chunk.timestamps.tolist()}
+            params.update({col: getattr(chunk, col).tolist() for col in OHLCV_COLUMNS})
 
-    async def get_last_closes_map(self, stock_ids: list[int], n: int = 10) -> dict[int, list[float]]:
-        stmt = (
-            select(self.model)
-            .where(self.model.stock_id.in_(stock_ids))
-            .order_by(self.model.stock_id, self.model.date.desc())
-        )
-        result = await self.session.execute(stmt)
-        rows = result.scalars().all()
+            result = await self.session.execute(stmt, params)
+            inserted += sum(1 for is_new in result.scalars() if is_new)
 
-        from collections import defaultdict
+        return inserted
+
+    async def get_last_closes_map(self, stock_ids: list[int], n: int = 10) -> dict[int, list[float]]:
         grouped = defaultdict(list)
+        if not stock_ids:
+            return grouped
 
-        for row in rows:
-            if len(grouped[row.stock_id]) < n:
-                grouped[row.stock_id].append(row.close)
+        result = await self.session.execute(self._last_n_per_stock(stock_ids, n))
+        for row in result.scalars().all():
+            grouped[row.stock_id].append(row.close)
 
         return grouped
 
+    async def get_bucketed_history(self, stock_id: int, count: int, limit: int | None = None) -> list[StockPriceOut]:
+        # limit=None — вся история; точки по возрастанию даты
+        result = await self.session.execute(
+            text(BUCKETED_HISTORY_SQL),
+            {"stock_id": stock_id, "count": count, "limit": limit},
+        )
+        return [StockPriceOut(stock_id=stock_id, **row) for row in result.mappings().all()]
+
     async def get_prices_by_stock(self, stock_id: int, limit: int | None = None):
         stmt = (
             select(self.model)
@@ -100,10 +217,142 @@ class StockPriceRepository(BaseRepository):
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
-    async def count_by_stock_and_date(self, stock_id: int, date: date) -> int:
-        stmt = select(func.count()).where(
-            self.model.stock_id == stock_id,
-            cast(self.model.date, Date) == date
+
+class SyncWatermarkRepository(BaseRepository):
+    model = CandleSyncWatermark
+    schema = None
+
+    async def get_map(self, board: str, interval: int) -> dict[int, datetime]:
+        stmt = select(self.model.stock_id, self.model.last_candle_at).filter_by(board=board, interval=interval)
+        result = await self.session.execute(stmt)
+        return {stock_id: last_candle_at for stock_id, last_candle_at in result.all()}
+
+    async def advance(self, stock_id: int, board: str, interval: int, last_candle_at: datetime) -> None:
+        stmt = insert(self.model).values(
+            stock_id=stock_id,
+            board=board,
+            interval=interval,
+            last_candle_at=last_candle_at,
+            updated_at=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uix_watermark_stock_board_interval",
+            set_={
+                # Водяной знак только растёт, даже если догружали старую историю
+                "last_candle_at": func.greatest(self.model.last_candle_at, stmt.excluded.last_candle_at),
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.session.execute(stmt)
+
+
+class LatestQuoteRepository(BaseRepository):
+    model = LatestQuote
+    schema = LatestQuoteOut
+
+    async def upsert_many(self, quotes: list[dict]) -> list:
+        # (stock_id, last, quoted_at) только реально обновлённых котировок
+        if not quotes:
+            return []
+
+        stmt = insert(self.model).values([{**q, "updated_at": datetime.utcnow()} for q in quotes])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.model.stock_id],
+            set_={
+                col: stmt.excluded[col]
+                for col in ("last", "open", "high", "low", "volume", "value", "quoted_at", "updated_at")
+            },
+            # Не трогаем строку, если ISS отдал тот же снимок, что и в прошлый раз
+            where=self.model.quoted_at < stmt.excluded.quoted_at,
+        ).returning(self.model.stock_id, self.model.last, self.model.quoted_at)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+
+class BackfillJobRepository(BaseRepository):
+    model = BackfillJob
+    schema = BackfillJobOut
+
+    async def create(
+        self, board: str, from_date: str | None, till_date: str | None, symbol: str | None, status: str = "queued"
+    ) -> int:
+        stmt = (
+            insert(self.model)
+            .values(board=board, from_date=from_date, till_date=till_date, symbol=symbol, status=status)
+            .returning(self.model.id)
+        )
+        return (await self.session.execute(stmt)).scalar_one()
+
+    async def get_completed_symbols(self, job_id: int) -> set[str]:
+        result = await self.session.execute(select(self.model.completed_symbols).filter_by(id=job_id))
+        return set(result.scalar_one_or_none() or [])
+
+    async def claim_next(self) -> int | None:
+        # SKIP LOCKED: несколько воркеров не возьмут одну задачу
+        stmt = (
+            select(self.model.id)
+            .filter_by(status="queued")
+            .order_by(self.model.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job_id = (await self.session.execute(stmt)).scalar_one_or_none()
+        if job_id is not None:
+            await self.set_status(job_id, "running")
+        return job_id
+
+    async def set_status(self, job_id: int, status: str, error: str | None = None, **values) -> None:
+        stmt = (
+            update(self.model)
+            .filter_by(id=job_id)
+            .values(status=status, error=error, updated_at=datetime.utcnow(), **values)
+        )
+        await self.session.execute(stmt)
+
+    async def record_progress(self, job_id: int, symbol: str, added: int, completed: bool) -> None:
+        values = {
+            "done_stocks": self.model.done_stocks + 1,
+            "added": self.model.added + added,
+            "updated_at": datetime.utcnow(),
+        }
+        if completed:
+            values["completed_symbols"] = func.array_append(self.model.completed_symbols, symbol)
+        await self.session.execute(update(self.model).filter_by(id=job_id).values(**values))
+
+
+class RollupRepository(BaseRepository):
+    model = StockPriceRollup
+    schema = StockPriceOut
+
+    async def refresh(self, stock_id: int, since: datetime) -> None:
+        for resolution, unit, source, date_col, source_filter in ROLLUP_LEVELS:
+            stmt = text(ROLLUP_SQL.format(source=source, date_col=date_col, source_filter=source_filter))
+            await self.session.execute(
+                stmt, {"stock_id": stock_id, "resolution": resolution, "unit": unit, "since": since}
+            )
+
+    async def get_unseeded(self, force: bool = False) -> list[tuple[int, datetime]]:
+        # (stock_id, первая свеча) акций, чья дневная свёртка не покрывает всю историю
+        result = await self.session.execute(text(UNSEEDED_ROLLUPS_SQL), {"force": force})
+        return result.all()
+
+    async def get_first_bucket(self, stock_id: int, resolution: str) -> datetime | None:
+        stmt = select(func.min(self.model.bucket_start)).filter_by(stock_id=stock_id, resolution=resolution)
+        return await self.session.scalar(stmt)
+
+    async def get_by_stock(self, stock_id: int, resolution: str, since: datetime | None = None) -> list[StockPriceOut]:
+        stmt = (
+            select(self.model)
+            .filter_by(stock_id=stock_id, resolution=resolution)
+            .order_by(self.model.bucket_start.desc())
         )
+        if since is not None:
+            stmt = stmt.where(self.model.bucket_start >= since)
         result = await self.session.execute(stmt)
-        return result.scalar()
+        return [
+            StockPriceOut(
+                stock_id=r.stock_id, date=r.bucket_start, open=r.open, high=r.high,
+                low=r.low, close=r.close, volume=r.volume, value=r.value,
+            )
+            for r in result.scalars().all()
+        ]
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.dependencies import UserIdDep, get_current_user_id
 from src.core.database import get_async_session
-from src.modules.stock_prices.schemas import StockPriceCreate, StockPriceHistoryResponse, StockPriceOut
+from src.modules.stock_prices.schemas import BackfillJobOut, LatestQuoteOut, StockPriceCreate, StockPriceHistoryResponse, StockPriceOut
 from src.modules.stock_prices.service import StockPriceService
 
 router = APIRouter(prefix="/prices", tags=["Stock Prices"])
@@ -30,19 +30,29 @@ async def get_latest_price(
     return await service.get_latest(stock_id)
 
 
+@router.get("/quote/{stock_id}", response_model=LatestQuoteOut)
+async def get_latest_quote(
+    user_id: UserIdDep,
+    stock_id: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    service = StockPriceService(session)
+    return await service.get_latest_quote(stock_id)
+
+
 @router.get("/history/{stock_id}", response_model=StockPriceHistoryResponse)
 async def get_price_history(
     stock_id: int,
     ser_id: UserIdDep,
     days: int = 30,
-    count: int = 100,
+    count: int = Query(100, ge=1),
     session: AsyncSession = Depends(get_async_session),
 ):
     service = StockPriceService(session)
     return await service.get_dynamic_aggregated_history(stock_id, days, count)
 
 
-@router.post("/sync")
+@router.post("/sync", response_model=BackfillJobOut)
 async def sync_prices(
     user_id: UserIdDep,
     board: str = Query(...),
@@ -50,7 +60,17 @@ async def sync_prices(
     till_date: str | None = Query(None, description="Формат: YYYY-MM-DD"),
     symbol: str | None = Query(None),
     session: AsyncSession = Depends(get_async_session)
+):
+    # Сама загрузка выполняется воркером: python -m src.jobs.backfill --worker
+    service = StockPriceService(session)
+    return await service.enqueue_backfill(board, from_date, till_date, symbol)
+
+
+@router.get("/sync/{job_id}", response_model=BackfillJobOut)
+async def get_sync_status(
+    user_id: UserIdDep,
+    job_id: int,
+    session: AsyncSession = Depends(get_async_session)
 ):
     service = StockPriceService(session)
-    count = await service.sync_from_moex(board, from_date, till_date, symbol)
-    return {"status": "ok", "synced": count}
+    return await service.get_backfill_job(job_id)
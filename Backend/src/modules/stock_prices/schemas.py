@@ -25,4 +25,29 @@ class StockPriceOut(StockPriceBase):
 class StockPriceHistoryResponse(BaseModel):
     data: list[StockPriceOut]
     change: float
-    change_rub: float
\ No newline at end of file
+    change_rub: float
+
+class LatestQuoteOut(BaseModel):
+    stock_id: int
+    last: float
+    open: float | None = None
+    high: float | None = None
+    low: float | None = None
+    volume: float | None = None
+    value: float | None = None
+    quoted_at: datetime
+
+
+class BackfillJobOut(BaseModel):
+    id: int
+    board: str
+    from_date: str | None = None
+    till_date: str | None = None
+    symbol: str | None = None
+    status: str
+    total_stocks: int
+    done_stocks: int
+    added: int
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
@@ -1,23 +1,47 @@
-import asyncio
 from collections import defaultdict
-from datetime import datetime, timedelta, date
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
 from fastapi import HTTPException
-# import requests
-import httpx
 from sqlalchemy import select, func, cast, Date
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.database import async_session_maker
-from src.modules.stock_prices.models import StockPrice
+from src.core.database import jobs_session_maker
+from src.modules.stock_prices.cache import quote_cache
 from src.modules.stocks.repository import StockRepository
-from src.modules.stock_prices.repository import StockPriceRepository
-from src.modules.stock_prices.schemas import StockPriceCreate, StockPriceHistoryResponse, StockPriceOut
+from src.modules.stock_prices.repository import (
+    BATCH_UPSERT_CHUNK_SIZE,
+    BackfillJobRepository,
+    LatestQuoteRepository,
+    RollupRepository,
+    StockPriceRepository,
+)
+from src.modules.stock_prices.schemas import (
+    BackfillJobOut,
+    LatestQuoteOut,
+    StockPriceCreate,
+    StockPriceHistoryResponse,
+    StockPriceOut,
+)
+from src.modules.stock_prices.snapshot import QuoteSnapshotIngest
+from src.modules.stock_prices.sync import MOSCOW, CandleSyncEngine, StockSyncResult
+
+
+HOURS_PER_TRADING_DAY = 17
+
+# Свёртки от грубой к мелкой: (resolution, точек на календарный день)
+ROLLUP_RESOLUTIONS = (
+    ("1w", 1 / 7),
+    ("1d", 5 / 7),
+)
 
 
 class StockPriceService:
     def __init__(self, session: AsyncSession):
         self.stock_repo = StockRepository(session)
         self.repo = StockPriceRepository(session)
+        self.quote_repo = LatestQuoteRepository(session)
+        self.job_repo = BackfillJobRepository(session)
+        self.rollup_repo = RollupRepository(session)
         self.session = session
 
     async def add_price(self, data: StockPriceCreate) -> StockPriceOut:
@@ -26,27 +50,73 @@ class StockPriceService:
 
         obj = await self.repo.add(data)
         await self.repo.session.commit()
+        quote_cache.invalidate(data.stock_id)
         return await self.repo.get_latest_by_stock(data.stock_id)
 
     async def get_latest(self, stock_id: int) -> StockPriceOut:
-        result = await self.repo.get_latest_by_stock(stock_id)
-        if not result:
+        quotes = await quote_cache.load(self.repo, [stock_id])
+        if stock_id not in quotes:
             raise HTTPException(status_code=404, detail="Цена не найдена")
+        return quotes[stock_id].latest
+
+    async def get_latest_quote(self, stock_id: int) -> LatestQuoteOut:
+        result = await self.quote_repo.get_one_or_none(stock_id=stock_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="Котировка не найдена")
         return result
 
     async def get_dynamic_aggregated_history(self, stock_id: int, days: int, count: int) -> StockPriceHistoryResponse:
-        from collections import defaultdict
+        rollups = await self._get_rollup_history(stock_id, days, count)
 
-        if days == 0:
-            raw = await self.repo.get_prices_by_stock(stock_id)
+        if rollups is not None:
+            aggregated = self._aggregate(stock_id, rollups, count)
         else:
-            approx_working_days = int(days * 5 / 7)
-            total_hours = approx_working_days * 17
-            raw = await self.repo.get_prices_by_stock(stock_id, limit=total_hours)
+            # Часовые свечи группируются прямо в БД — по сети идёт ~count строк
+            total_hours = None if days == 0 else int(days * 5 / 7) * HOURS_PER_TRADING_DAY
+            aggregated = await self.repo.get_bucketed_history(stock_id, count, limit=total_hours)
 
-        if not raw:
+        if not aggregated:
             return StockPriceHistoryResponse(data=[], change=0.0, change_rub=0.0)
 
+        first_close = aggregated[0].close
+        last_close = aggregated[-1].close
+        change_rub = last_close - first_close
+        change = (change_rub / first_close) * 100 if first_close else 0.0
+
+        return StockPriceHistoryResponse(
+            data=aggregated,
+            change=round(change, 2),
+            change_rub=round(change_rub, 2)
+        )
+
+    async def _get_rollup_history(self, stock_id: int, days: int, count: int) -> list[StockPriceOut] | None:
+        """
+        Берёт самую грубую свёртку, которая ещё даёт не меньше ``count`` точек.
+        ``None`` — свёртка не подходит или не покрывает весь период
+        (ещё не построена для старых свечей), нужны часовые свечи.
+        """
+        first_date = await self.repo.get_first_date(stock_id)
+        if first_date is None:
+            return None
+
+        now = datetime.now(MOSCOW).replace(tzinfo=None)
+        since = None if days == 0 else now - timedelta(days=days)
+        # Самая ранняя точка, которая должна попасть в график
+        required = first_date if since is None else max(since, first_date)
+        span_days = (now - required).days + 1
+
+        for resolution, days_per_point in ROLLUP_RESOLUTIONS:
+            if span_days * days_per_point < count:
+                continue
+            first_bucket = await self.rollup_repo.get_first_bucket(stock_id, resolution)
+            # Бакет, содержащий required, начинается не позже него
+            if first_bucket is None or first_bucket > required:
+                return None
+            return await self.rollup_repo.get_by_stock(stock_id, resolution, since)
+        return None
+
+    @staticmethod
+    def _aggregate(stock_id: int, raw: list, count: int) -> list[StockPriceOut]:
         # Аггрегация по count — всегда, независимо от days
         group_size = max(1, len(raw) // count)
         grouped = defaultdict(list)
@@ -69,133 +139,136 @@ class StockPriceService:
                 volume=sum(r.volume or 0 for r in rows),
                 value=sum(r.value or 0 for r in rows)
             ))
-        aggregated = list(reversed(aggregated))
-
-        first_close = aggregated[0].close
-        last_close = aggregated[-1].close
-        change_rub = last_close - first_close
-        change = (change_rub / first_close) * 100 if first_close else 0.0
-
-        return StockPriceHistoryResponse(
-            data=aggregated,
-            change=round(change, 2),
-            change_rub=round(change_rub, 2)
-        )
+        return list(reversed(aggregated))
 
 
     @staticmethod
     async def sync_from_moex(board: str, from_date: str | None, till_date: str | None, symbol: str | None = None) -> int:
-        async with async_session_maker() as session:
-            service = StockPriceService(session)
-            stock_repo = service.stock_repo
-            repo = service.repo
+        filters = {"board": board, "symbol": symbol} if symbol else {"board": board}
+        async with jobs_session_maker() as session:
+            stocks = await StockRepository(session).get_all_by(**filters)
 
-            stocks = await stock_repo.get_all()
-            stocks = [s for s in stocks if s.board == board]
-            if symbol:
-                stocks = [s for s in stocks if s.symbol == symbol]
+        if not stocks:
+            return 0
 
-            if not stocks:
-                return 0
+        engine = CandleSyncEngine(board, from_date, till_date)
+        report = await engine.run(stocks)
+        return report.total
 
-            today = date.today()
-            total = 0
+    @staticmethod
+    async def sync_snapshot_from_moex(board: str) -> int:
+        return await QuoteSnapshotIngest(board).run()
 
-            for stock in stocks:
-                await asyncio.sleep(0.05)  # троттлинг
+    @staticmethod
+    async def rebuild_rollups(force: bool = False) -> int:
+        """
+        Строит свёртки по всей уже загруженной истории: для акций, у которых
+        дневная свёртка начинается позже первой свечи (или для всех при ``force``).
+        """
+        async with jobs_session_maker() as session:
+            stale = await RollupRepository(session).get_unseeded(force)
+
+        for i, (stock_id, first_date) in enumerate(stale, 1):
+            async with jobs_session_maker() as session:
+                await RollupRepository(session).refresh(stock_id, first_date)
+                await session.commit()
+            print(f"[~] Свёртки: {i}/{len(stale)} (stock_id={stock_id})")
+
+        print(f"[✓] Свёртки перестроены для {len(stale)} акций")
+        return len(stale)
+
+    # === Backfill-задачи ===
+    async def enqueue_backfill(
+        self, board: str, from_date: str | None, till_date: str | None, symbol: str | None = None,
+        status: str = "queued",
+    ) -> BackfillJobOut:
+        """
+        Создаёт задачу. ``status="running"`` — задачу сразу выполняет вызывающий
+        процесс: строка вставляется уже занятой, воркеры очереди её не заберут.
+        """
+        for value in (from_date, till_date):
+            if value is not None:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    raise HTTPException(status_code=422, detail=f"Некорректная дата: {value}")
 
-                count_today = await repo.count_by_stock_and_date(stock.id, today)
-                if count_today >= 17:
-                    print(f"[~] {stock.symbol} — уже {count_today} свечей, пропускаем")
-                    continue
+        job_id = await self.job_repo.create(board, from_date, till_date, symbol, status=status)
+        await self.session.commit()
+        return await self.get_backfill_job(job_id)
 
-                actual_from = from_date
-                actual_till = till_date or today.strftime("%Y-%m-%d")
+    async def get_backfill_job(self, job_id: int) -> BackfillJobOut:
+        job = await self.job_repo.get_one_or_none(id=job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        return job
 
-                if not from_date:
-                    latest = await repo.get_latest_by_stock(stock.id)
-                    if latest:
-                        actual_from = latest.date.strftime("%Y-%m-%d")
-                    else:
-                        one_month_ago = today - timedelta(days=30)
-                        actual_from = one_month_ago.strftime("%Y-%m-%d")
+    @staticmethod
+    async def run_backfill_job(
+        job_id: int,
+        concurrency: int | None = None,
+        batch_size: int = BATCH_UPSERT_CHUNK_SIZE,
+        executor: Executor | None = None,
+    ) -> BackfillJobOut:
+        """
+        Выполняет (или возобновляет) задачу: бумаги из ``completed_symbols``
+        пропускаются, прогресс фиксируется после каждой акции.
+        """
+        try:
+            return await StockPriceService._execute_backfill_job(job_id, concurrency, batch_size, executor)
+        except Exception as e:
+            # Иначе задача навсегда останется running: claim_next берёт только queued
+            print(f"[!] Задача {job_id} прервана: {e}")
+            async with jobs_session_maker() as session:
+                await BackfillJobRepository(session).set_status(job_id, "failed", error=str(e))
+                await session.commit()
+            raise
 
-                try:
-                    prices = await service._fetch_prices_for_stock(
-                        stock_id=stock.id,
-                        symbol=stock.symbol,
-                        board=board,
-                        from_date=actual_from,
-                        till_date=actual_till
-                    )
-                    added_count = await repo.bulk_upsert_prices(prices)
-                    await session.commit()
-                    total += added_count
-
-                    if added_count > 0:
-                        print(f"[✓] {stock.symbol} — добавлено {added_count} новых цен")
-                    else:
-                        print(f"[=] {stock.symbol} — новых цен нет")
-
-                except Exception as e:
-                    await session.rollback()
-                    print(f"[!] Ошибка при обработке {stock.symbol}: {e}")
-                    continue
-
-            return total
-
-    async def _fetch_prices_for_stock(self, stock_id: int, symbol: str, board: str, from_date: str, till_date: str) -> list[StockPrice]:
-        url = f"https://iss.moex.com/iss/engines/stock/markets/shares/securities/{symbol}/candles.json"
-        full_data = []
-
-        from_dt = datetime.strptime(from_date, "%Y-%m-%d")
-        till_dt = datetime.strptime(till_date, "%Y-%m-%d")
-        step = timedelta(days=25)
-        current = from_dt
-
-        async with httpx.AsyncClient(timeout=httpx.Timeout(10.0)) as client:
-            while current <= till_dt:
-                next_until = min(current + step, till_dt)
-                params = {
-                    "from": current.strftime("%Y-%m-%d"),
-                    "till": next_until.strftime("%Y-%m-%d"),
-                    "interval": 60,
-                }
+    @staticmethod
+    async def _execute_backfill_job(
+        job_id: int,
+        concurrency: int | None,
+        batch_size: int,
+        executor: Executor | None,
+    ) -> BackfillJobOut:
+        async with jobs_session_maker() as session:
+            service = StockPriceService(session)
+            job = await service.get_backfill_job(job_id)
+            completed = await service.job_repo.get_completed_symbols(job_id)
+
+            stocks = await service.stock_repo.get_all_by(board=job.board)
+            if job.symbol:
+                stocks = [s for s in stocks if s.symbol == job.symbol]
+            pending = [s for s in stocks if s.symbol not in completed]
+
+            await service.job_repo.set_status(job_id, "running", total_stocks=len(stocks), done_stocks=len(completed))
+            await session.commit()
+
+        async def on_stock_done(result: StockSyncResult):
+            async with jobs_session_maker() as session:
+                await BackfillJobRepository(session).record_progress(
+                    job_id, result.symbol, result.added, not result.incomplete
+                )
+                await session.commit()
+
+        engine = CandleSyncEngine(
+            job.board,
+            job.from_date,
+            job.till_date,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            executor=executor,
+            on_stock_done=on_stock_done,
+        )
+        report = await engine.run(pending)
 
-                try:
-                    response = await client.get(url, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    columns = data.get("candles", {}).get("columns", [])
-                    rows = data.get("candles", {}).get("data", [])
-
-                    if not columns or not rows:
-                        current = next_until + timedelta(days=1)
-                        continue
-
-                    idx = {col: i for i, col in enumerate(columns)}
-
-                    for row in rows:
-                        try:
-                            begin = datetime.strptime(row[idx["begin"]], "%Y-%m-%d %H:%M:%S")
-                            full_data.append(StockPrice(
-                                stock_id=stock_id,
-                                date=begin,
-                                open=row[idx["open"]],
-                                high=row[idx["high"]],
-                                low=row[idx["low"]],
-                                close=row[idx["close"]],
-                                volume=row[idx["volume"]],
-                                value=row[idx["value"]],
-                            ))
-                        except Exception as e:
-                            print(f"[!] Ошибка при обработке свечи: {e}, строка: {row}")
-                            continue
-
-                except Exception as e:
-                    print(f"[!] Ошибка запроса с {params['from']} по {params['till']}: {e}")
-
-                current = next_until + timedelta(days=1)
-
-        return full_data
\ No newline at end of file
+        incomplete = [r.symbol for r in report.failed]
+        async with jobs_session_maker() as session:
+            service = StockPriceService(session)
+            if incomplete:
+                error = f"Не загружено полностью ({len(incomplete)}): {', '.join(incomplete[:20])}"
+                await service.job_repo.set_status(job_id, "failed", error=error)
+            else:
+                await service.job_repo.set_status(job_id, "done")
+            await session.commit()
+            return await service.get_backfill_job(job_id)
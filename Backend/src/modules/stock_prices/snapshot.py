@@ -0,0 +1,88 @@
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.config import settings
+from src.core.database import jobs_session_maker
+from src.core.events import PriceEvent, price_events
+from src.core.http_client import HttpClientRegistry, http_clients
+from src.modules.stock_prices.repository import LatestQuoteRepository
+from src.modules.stocks.repository import StockRepository
+
+
+MARKETDATA_COLUMNS = ("SECID", "LAST", "LCURRENTPRICE", "OPEN", "HIGH", "LOW", "VOLTODAY", "VALTODAY", "SYSTIME")
+
+
+class QuoteSnapshotIngest:
+    """
+    Снимок последних цен всего режима торгов одним запросом к ISS ``marketdata``.
+
+    В отличие от свечной синхронизации не ходит по каждой бумаге отдельно:
+    за цикл — один HTTP-запрос и один upsert в ``latest_quotes``.
+    """
+
+    def __init__(
+        self,
+        board: str,
+        base_url: str | None = None,
+        session_maker: async_sessionmaker = jobs_session_maker,
+        http: HttpClientRegistry = http_clients,
+    ):
+        self.board = board
+        self.base_url = (base_url or settings.MOEX_ISS_URL).rstrip("/")
+        self.session_maker = session_maker
+        self.http = http
+
+    async def run(self) -> int:
+        started = time.perf_counter()
+        rows = await self._fetch_marketdata()
+
+        async with self.session_maker() as session:
+            stocks = await StockRepository(session).get_all_by(board=self.board)
+            ids_by_symbol = {s.symbol: s.id for s in stocks}
+
+            quotes = []
+            for row in rows:
+                stock_id = ids_by_symbol.get(row["SECID"])
+                last = row["LAST"] if row["LAST"] is not None else row["LCURRENTPRICE"]
+                if stock_id is None or last is None or not row["SYSTIME"]:
+                    continue
+
+                quotes.append({
+                    "stock_id": stock_id,
+                    "last": last,
+                    "open": row["OPEN"],
+                    "high": row["HIGH"],
+                    "low": row["LOW"],
+                    "volume": row["VOLTODAY"],
+                    "value": row["VALTODAY"],
+                    "quoted_at": datetime.strptime(row["SYSTIME"], "%Y-%m-%d %H:%M:%S"),
+                })
+
+            updated = await LatestQuoteRepository(session).upsert_many(quotes)
+            await session.commit()
+
+        for stock_id, last, quoted_at in updated:
+            price_events.publish(PriceEvent(stock_id, last, quoted_at))
+
+        print(f"[i] Снимок {self.board}: котировок {len(quotes)}, обновлено {len(updated)} "
+              f"({time.perf_counter() - started:.2f}s)")
+        return len(updated)
+
+    async def _fetch_marketdata(self) -> list[dict]:
+        url = f"{self.base_url}/engines/stock/markets/shares/boards/{self.board}/securities.json"
+        params = {
+            "iss.meta": "off",
+            "iss.only": "marketdata",
+            "marketdata.columns": ",".join(MARKETDATA_COLUMNS),
+        }
+        response = await self.http.get(url, params=params)
+        response.raise_for_status()
+
+        marketdata = response.json().get("marketdata", {})
+        columns = marketdata.get("columns", [])
+        return [
+            {col: item.get(col) for col in MARKETDATA_COLUMNS}
+            for item in (dict(zip(columns, row)) for row in marketdata.get("data", []))
+        ]
@@ -0,0 +1,292 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+
+import pytz
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.config import settings
+from src.core.database import jobs_session_maker
+from src.core.http_client import HttpClientRegistry, http_clients
+from src.core.events import PriceEvent, price_events
+from src.modules.stock_prices.cache import quote_cache
+from src.modules.stock_prices.parsing import CandleBatch, parse_candles_page
+from src.modules.stock_prices.repository import (
+    BATCH_UPSERT_CHUNK_SIZE,
+    RollupRepository,
+    StockPriceRepository,
+    SyncWatermarkRepository,
+)
+from src.modules.stocks.schemas import StockOut
+
+
+MOSCOW = pytz.timezone("Europe/Moscow")
+CANDLE_INTERVAL = 60  # минутные интервалы ISS: 60 — часовые свечи
+WINDOW_RETRY_BACKOFF = 0.5  # секунд, удваивается с каждой попыткой
+
+
+@dataclass
+class WindowStats:
+    total: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+    watermark: datetime | None = None
+
+
+@dataclass
+class StockSyncResult:
+    symbol: str
+    added: int = 0
+    elapsed: float = 0.0
+    skipped: bool = False
+    error: str | None = None
+    windows: WindowStats = field(default_factory=WindowStats)
+
+    @property
+    def incomplete(self) -> bool:
+        # Акция упала целиком или часть окон так и не загрузилась
+        return bool(self.error or self.windows.failed)
+
+
+@dataclass
+class SyncReport:
+    wall_time: float = 0.0
+    results: list[StockSyncResult] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(r.added for r in self.results)
+
+    @property
+    def failed(self) -> list[StockSyncResult]:
+        return [r for r in self.results if r.incomplete]
+
+    def summary(self) -> str:
+        latencies = sorted(r.elapsed for r in self.results if not r.skipped)
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p_max = latencies[-1] if latencies else 0.0
+        windows = [r.windows for r in self.results]
+        partial = sum(1 for r in self.failed if not r.error)
+        return (
+            f"акций: {len(self.results)}, добавлено: {self.total}, "
+            f"ошибок: {len(self.failed)} (частично загружено: {partial}), "
+            f"окон: {sum(w.succeeded for w in windows)} ок / {sum(w.retried for w in windows)} повторов / "
+            f"{sum(w.failed for w in windows)} не загружено, "
+            f"время: {self.wall_time:.2f}s, p50: {p50:.2f}s, max: {p_max:.2f}s"
+        )
+
+
+# Часовые свечи с MOEX ISS: акции параллельно, каждая со своей сессией;
+# без from_date — инкрементально, от водяных знаков candle_sync_watermarks
+class CandleSyncEngine:
+    def __init__(
+        self,
+        board: str,
+        from_date: str | None,
+        till_date: str | None,
+        concurrency: int | None = None,
+        window_retries: int | None = None,
+        batch_size: int = BATCH_UPSERT_CHUNK_SIZE,
+        executor: Executor | None = None,
+        on_stock_done: Callable[[StockSyncResult], Awaitable[None]] | None = None,
+        base_url: str | None = None,
+        session_maker: async_sessionmaker = jobs_session_maker,
+        http: HttpClientRegistry = http_clients,
+    ):
+        self.board = board
+        self.from_date = from_date
+        self.till_date = till_date
+        self.concurrency = concurrency or settings.MOEX_SYNC_CONCURRENCY
+        self.base_url = (base_url or settings.MOEX_ISS_URL).rstrip("/")
+        self.session_maker = session_maker
+        self.http = http
+        self.window_retries = settings.MOEX_WINDOW_RETRIES if window_retries is None else window_retries
+        self.batch_size = batch_size
+        self.executor = executor  # пул процессов для разбора ответов ISS (большие backfill)
+        self.on_stock_done = on_stock_done  # колбэк после коммита каждой акции (прогресс задачи)
+
+        # Общий на все акции бюджет одновременных запросов к хосту ISS
+        host_policy = http.policy(urlsplit(self.base_url).hostname or "")
+        self.host_budget = asyncio.Semaphore(host_policy.max_connections)
+
+        self.watermarks: dict[int, datetime] = {}
+
+    async def run(self, stocks: list[StockOut]) -> SyncReport:
+        started = time.perf_counter()
+
+        async with self.session_maker() as session:
+            self.watermarks = await SyncWatermarkRepository(session).get_map(self.board, CANDLE_INTERVAL)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(stock: StockOut) -> StockSyncResult:
+            async with semaphore:
+                result = await self._sync_stock(stock)
+            if self.on_stock_done:
+                await self.on_stock_done(result)
+            return result
+
+        results = await asyncio.gather(*(worker(s) for s in stocks))
+
+        report = SyncReport(wall_time=time.perf_counter() - started, results=list(results))
+        print(f"[i] Синхронизация {self.board}: {report.summary()}")
+        return report
+
+    async def _sync_stock(self, stock: StockOut) -> StockSyncResult:
+        started = time.perf_counter()
+        result = StockSyncResult(symbol=stock.symbol)
+        now = datetime.now(MOSCOW).replace(tzinfo=None)
+        today = now.date()
+        watermark = self.watermarks.get(stock.id)
+
+        if not self.from_date and watermark and watermark >= now.replace(minute=0, second=0, microsecond=0):
+            print(f"[~] {stock.symbol} — свеча за текущий час уже есть, пропускаем")
+            result.skipped = True
+            return result
+
+        async with self.session_maker() as session:
+            repo = StockPriceRepository(session)
+            watermark_repo = SyncWatermarkRepository(session)
+            rollup_repo = RollupRepository(session)
+            try:
+                actual_from = self.from_date
+                actual_till = self.till_date or today.strftime("%Y-%m-%d")
+
+                if not self.from_date:
+                    if not watermark:
+                        # Первый прогон для акции: водяного знака ещё нет
+                        latest = await repo.get_latest_by_stock(stock.id)
+                        watermark = latest.date if latest else None
+
+                    if watermark:
+                        actual_from = watermark.strftime("%Y-%m-%d")
+                    else:
+                        one_month_ago = today - timedelta(days=30)
+                        actual_from = one_month_ago.strftime("%Y-%m-%d")
+
+                prices, result.windows = await self._fetch_prices_for_stock(
+                    stock_id=stock.id,
+                    symbol=stock.symbol,
+                    from_date=actual_from,
+                    till_date=actual_till,
+                )
+                # При инкрементальной загрузке перезаписываем последнюю (незакрытую) свечу
+                result.added = await repo.bulk_upsert_batch(
+                    stock.id, prices, update_existing=not self.from_date, chunk_size=self.batch_size
+                )
+
+                if len(prices):
+                    await rollup_repo.refresh(stock.id, prices.first_date)
+
+                if result.windows.watermark:
+                    await watermark_repo.advance(stock.id, self.board, CANDLE_INTERVAL, result.windows.watermark)
+
+                await session.commit()
+
+                if len(prices):
+                    quote = (await quote_cache.refresh(repo, [stock.id])).get(stock.id)
+                    if quote:
+                        price_events.publish(PriceEvent(stock.id, quote.latest.close, quote.latest.date))
+
+            except Exception as e:
+                await session.rollback()
+                result.error = str(e)
+                print(f"[!] Ошибка при обработке {stock.symbol}: {e}")
+                return result
+
+            finally:
+                result.elapsed = time.perf_counter() - started
+
+        if result.windows.failed:
+            print(f"[!] {stock.symbol} — загружено частично: добавлено {result.added}, "
+                  f"не загружено окон {result.windows.failed} из {result.windows.total} ({result.elapsed:.2f}s)")
+        elif result.added > 0:
+            print(f"[✓] {stock.symbol} — добавлено {result.added} новых цен ({result.elapsed:.2f}s)")
+        else:
+            print(f"[=] {stock.symbol} — новых цен нет ({result.elapsed:.2f}s)")
+        return result
+
+    async def _fetch_prices_for_stock(
+        self,
+        stock_id: int,
+        symbol: str,
+        from_date: str,
+        till_date: str,
+    ) -> tuple[CandleBatch, WindowStats]:
+        # Окна по 25 дней (ISS отдаёт до 500 строк) запрашиваются одновременно;
+        # склейка в исходном порядке окон сохраняет порядок свечей
+        url = f"{self.base_url}/engines/stock/markets/shares/securities/{symbol}/candles.json"
+        windows = self._date_windows(
+            datetime.strptime(from_date, "%Y-%m-%d"),
+            datetime.strptime(till_date, "%Y-%m-%d"),
+        )
+        stats = WindowStats(total=len(windows))
+
+        pages = await asyncio.gather(*(self._fetch_window(url, symbol, w, stats) for w in windows))
+
+        full_data = CandleBatch()
+        complete = True
+        for page in pages:
+            if page is None:
+                complete = False
+                continue
+            full_data.extend(page)
+            # Водяной знак двигаем только по непрерывному префиксу успешных окон,
+            # чтобы следующий прогон заново запросил пропущенный период
+            if complete and len(page):
+                stats.watermark = page.last_date
+
+        return full_data, stats
+
+    async def _fetch_window(
+        self,
+        url: str,
+        symbol: str,
+        window: tuple[datetime, datetime],
+        stats: WindowStats,
+    ) -> CandleBatch | None:
+        params = {
+            "from": window[0].strftime("%Y-%m-%d"),
+            "till": window[1].strftime("%Y-%m-%d"),
+            "interval": CANDLE_INTERVAL,
+        }
+
+        for attempt in range(self.window_retries + 1):
+            if attempt:
+                if attempt == 1:  # считаем окна, а не попытки
+                    stats.retried += 1
+                await asyncio.sleep(WINDOW_RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                async with self.host_budget:
+                    response = await self.http.get(url, params=params)
+                response.raise_for_status()
+                if self.executor:
+                    loop = asyncio.get_running_loop()
+                    page = await loop.run_in_executor(self.executor, parse_candles_page, response.content)
+                else:
+                    page = parse_candles_page(response.content)
+                stats.succeeded += 1
+                return page
+
+            except Exception as e:
+                print(f"[!] Ошибка запроса {symbol} с {params['from']} по {params['till']} "
+                      f"(попытка {attempt + 1}): {e}")
+
+        stats.failed += 1
+        return None
+
+    @staticmethod
+    def _date_windows(from_dt: datetime, till_dt: datetime) -> list[tuple[datetime, datetime]]:
+        step = timedelta(days=25)
+        windows = []
+        current = from_dt
+        while current <= till_dt:
+            next_until = min(current + step, till_dt)
+            windows.append((current, next_until))
+            current = next_until + timedelta(days=1)
+        return windows
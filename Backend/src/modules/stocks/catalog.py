@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.config import settings
+from src.core.http_client import HttpClientRegistry, http_clients
+from src.modules.stocks.repository import CATALOG_CHUNK_SIZE, StockRepository
+from src.modules.stocks.schemas import CatalogUpsertOut
+
+
+# Запрашиваемый размер страницы; ISS может отдать меньше — смещение считается по факту
+PAGE_SIZE = 100
+
+
+@dataclass
+class CatalogIngestReport:
+    dry_run: bool = False
+    pages: int = 0
+    fetched: int = 0
+    skipped: int = 0  # отброшены фильтром (RU0…, без secid)
+    chunks: int = 0
+    written: CatalogUpsertOut = field(default_factory=CatalogUpsertOut)
+    fetch_time: float = 0.0
+    write_time: float = 0.0
+    wall_time: float = 0.0
+
+    @property
+    def accepted(self) -> int:
+        return self.fetched - self.skipped
+
+    def summary(self) -> str:
+        mode = " (dry-run, откатано)" if self.dry_run else ""
+        return (
+            f"страниц: {self.pages}, строк: {self.fetched}, отброшено: {self.skipped}, "
+            f"новых: {self.written.inserted}, изменено: {self.written.updated}, "
+            f"без изменений: {self.written.unchanged}, пачек: {self.chunks}, "
+            f"загрузка: {self.fetch_time:.2f}s, запись: {self.write_time:.2f}s, "
+            f"всего: {self.wall_time:.2f}s{mode}"
+        )
+
+
+class CatalogIngest:
+    """
+    Потоковая загрузка каталога акций MOEX.
+
+    Следующие ``pipeline`` страниц запрашиваются заранее через общий клиент,
+    строки фильтруются по мере прихода и пишутся в БД пачками по ``chunk_size``,
+    поэтому весь каталог целиком в памяти не держится. В режиме ``dry_run``
+    все записи выполняются и откатываются — отчёт показывает, что изменилось бы.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        pipeline: int | None = None,
+        chunk_size: int = CATALOG_CHUNK_SIZE,
+        dry_run: bool = False,
+        base_url: str | None = None,
+        http: HttpClientRegistry = http_clients,
+    ):
+        self.session = session
+        self.repo = StockRepository(session)
+        self.pipeline = max(1, pipeline or settings.MOEX_CATALOG_PIPELINE)
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.base_url = (base_url or settings.MOEX_ISS_URL).rstrip("/")
+        self.http = http
+
+    async def run(self) -> CatalogIngestReport:
+        report = CatalogIngestReport(dry_run=self.dry_run)
+        started = time.perf_counter()
+        buffer: list[dict] = []
+
+        try:
+            async for rows in self._pages(report):
+                for item in rows:
+                    secid = item.get("secid")
+                    if isinstance(secid, str) and not secid.startswith("RU0"):
+                        buffer.append(item)
+                    else:
+                        report.skipped += 1
+
+                if len(buffer) >= self.chunk_size:
+                    await self._write(buffer, report)
+                    buffer = []
+
+            if buffer:
+                await self._write(buffer, report)
+
+            if self.dry_run:
+                await self.session.rollback()
+            else:
+                await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        finally:
+            report.wall_time = time.perf_counter() - started
+
+        print(f"[i] Каталог MOEX: {report.summary()}")
+        return report
+
+    async def _write(self, rows: list[dict], report: CatalogIngestReport) -> None:
+        started = time.perf_counter()
+        stats = await self.repo.upsert_many(rows, chunk_size=self.chunk_size)
+        report.write_time += time.perf_counter() - started
+        report.chunks += 1
+        report.written.inserted += stats.inserted
+        report.written.updated += stats.updated
+        report.written.unchanged += stats.unchanged
+
+    async def _pages(self, report: CatalogIngestReport) -> AsyncIterator[list[dict]]:
+        """
+        Страницы по порядку; пока обрабатывается одна, следующие уже в полёте.
+
+        Смещение следующей страницы — ``start + len(rows)``, как у ISS. Заранее
+        запрошенные страницы считаются по размеру первой; если ответ оказался
+        короче и их смещения разошлись с фактическим, они отменяются и загрузка
+        продолжается с правильного места. Конец каталога — пустая страница.
+        """
+        pending: deque[tuple[int, asyncio.Task]] = deque()
+        page_size = 0  # неизвестен до первого ответа — до него одна страница в полёте
+        next_start = 0
+
+        try:
+            while True:
+                while len(pending) < (self.pipeline if page_size else 1):
+                    pending.append((next_start, asyncio.create_task(self._fetch_page(next_start, report))))
+                    next_start += page_size
+
+                start, task = pending.popleft()
+                rows = await task
+                if not rows:
+                    return
+
+                page_size = page_size or len(rows)
+                expected = start + len(rows)
+                if (pending[0][0] if pending else next_start) != expected:
+                    await self._cancel(pending)
+                    next_start = expected
+
+                report.pages += 1
+                report.fetched += len(rows)
+                yield rows
+        finally:
+            await self._cancel(pending)
+
+    @staticmethod
+    async def _cancel(pending: deque[tuple[int, asyncio.Task]]) -> None:
+        tasks = [task for _, task in pending]
+        pending.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_page(self, start: int, report: CatalogIngestReport) -> list[dict]:
+        url = f"{self.base_url}/securities.json"
+        params = {
+            "engine": "stock",
+            "market": "shares",
+            "is_trading": 1,
+            "start": start,
+            "limit": PAGE_SIZE,
+            "iss.meta": "off",
+        }
+        started = time.perf_counter()
+        r = await self.http.get(url, params=params)
+        r.raise_for_status()
+        report.fetch_time += time.perf_counter() - started
+
+        data = r.json()["securities"]
+        columns = data["columns"]
+        return [dict(zip(columns, row)) for row in data["data"]]
@@ -0,0 +1,188 @@
+import os, ctypes
+# cairo для cairosvg на Windows; в процессах пула загружается при импорте этого модуля
+if os.name == "nt":
+    CAIRO_DIR = r"C:\Program Files\GTK3-Runtime Win64\bin"
+    os.add_dll_directory(CAIRO_DIR)
+    ctypes.CDLL(os.path.join(CAIRO_DIR, "libcairo-2.dll"))
+
+import asyncio
+import hashlib
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from io import BytesIO
+
+import cairosvg
+from PIL import Image
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.config import settings
+from src.core.database import jobs_session_maker
+from src.core.http_client import HttpClientRegistry, http_clients
+from src.modules.stocks.repository import StockRepository
+
+
+LOGO_URL = "https://finrange.com/storage/companies/logo/svg/MOEX_{symbol}.svg"
+COLOR_SIZE = 64
+COLOR_WRITE_BATCH = 50  # цветов в одном UPDATE, заодно шаг фиксации прогресса
+
+
+def get_dominant_color_hex(img: Image.Image) -> str:
+    img = img.convert("RGB").resize((COLOR_SIZE, COLOR_SIZE))
+    # Гистограмма цветов считается внутри Pillow, без цикла по пикселям в Python
+    count, dominant = max(img.getcolors(maxcolors=COLOR_SIZE * COLOR_SIZE))
+    return '#%02x%02x%02x' % dominant
+
+
+def render_dominant_color(svg: bytes) -> str:
+    """SVG → PNG → доминирующий цвет. Выполняется в процессе пула, не в event loop."""
+    png_bytes = cairosvg.svg2png(bytestring=svg)
+    return get_dominant_color_hex(Image.open(BytesIO(png_bytes)))
+
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.COLOR_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+@dataclass
+class ColorJob:
+    id: int
+    symbol: str | None = None
+    force: bool = False
+    status: str = "queued"  # queued | running | done | failed
+    total: int = 0
+    processed: int = 0
+    updated: int = 0
+    unchanged: int = 0  # логотип не изменился с прошлого прогона
+    failed: int = 0
+    error: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+    elapsed: float = 0.0
+
+
+class ColorPipeline:
+    """
+    Пересчёт доминирующих цветов логотипов.
+
+    Логотипы скачиваются параллельно (не больше ``concurrency`` одновременно),
+    растеризация и подсчёт цвета идут в пуле процессов. По sha256 содержимого
+    SVG уже обработанные и не изменившиеся логотипы пропускаются.
+    """
+
+    def __init__(
+        self,
+        job: ColorJob,
+        concurrency: int | None = None,
+        session_maker: async_sessionmaker = jobs_session_maker,
+        http: HttpClientRegistry = http_clients,
+    ):
+        self.job = job
+        self.concurrency = concurrency or settings.COLOR_DOWNLOAD_CONCURRENCY
+        self.session_maker = session_maker
+        self.http = http
+
+    async def run(self) -> ColorJob:
+        job = self.job
+        job.status = "running"
+        started = time.perf_counter()
+        try:
+            async with self.session_maker() as session:
+                repo = StockRepository(session)
+                sources = await repo.get_color_sources(job.symbol)
+                job.total = len(sources)
+
+                semaphore = asyncio.Semaphore(self.concurrency)
+                pending: list[tuple[str, str, str]] = []
+
+                async def process(source):
+                    async with semaphore:
+                        result = await self._process(*source)
+                    job.processed += 1
+                    if result:
+                        pending.append(result)
+
+                tasks = [asyncio.create_task(process(s)) for s in sources]
+                try:
+                    for done in asyncio.as_completed(tasks):
+                        await done
+                        if len(pending) >= COLOR_WRITE_BATCH:
+                            batch, pending[:] = pending[:], []
+                            await self._write(session, repo, batch)
+                finally:
+                    # При ошибке записи остальные загрузки не нужны: отменяем и дожидаемся их
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+                if pending:
+                    await self._write(session, repo, pending)
+
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"[!] Ошибка пересчёта цветов: {e}")
+        finally:
+            job.elapsed = time.perf_counter() - started
+            job.finished_at = datetime.utcnow()
+
+        print(f"[i] Цвета логотипов: {job.updated} обновлено, {job.unchanged} без изменений, "
+              f"{job.failed} ошибок из {job.total} ({job.elapsed:.2f}s)")
+        return job
+
+    async def _process(self, symbol: str, logo_hash: str | None, color: str | None) -> tuple[str, str, str] | None:
+        try:
+            r = await self.http.get(LOGO_URL.format(symbol=symbol))
+            r.raise_for_status()
+
+            content_hash = hashlib.sha256(r.content).hexdigest()
+            if not self.job.force and color and content_hash == logo_hash:
+                self.job.unchanged += 1
+                return None
+
+            loop = asyncio.get_running_loop()
+            new_color = await loop.run_in_executor(get_executor(), render_dominant_color, r.content)
+            return symbol, new_color, content_hash
+        except Exception as e:
+            self.job.failed += 1
+            print(f"[!] Ошибка обработки {symbol}: {e}")
+            return None
+
+    async def _write(self, session, repo: StockRepository, batch: list[tuple[str, str, str]]) -> None:
+        await repo.update_colors(batch)
+        await session.commit()
+        self.job.updated += len(batch)
+
+
+# Задачи живут в памяти процесса: статус нужен, пока идёт пересчёт, историю не храним.
+# Другой воркер или перезапущенный процесс про задачу не знает — там статус отдаёт 404.
+color_jobs: dict[int, ColorJob] = {}
+_job_ids = itertools.count(1)
+_tasks: set[asyncio.Task] = set()
+
+
+def start_color_job(symbol: str | None = None, force: bool = False) -> ColorJob:
+    job = ColorJob(id=next(_job_ids), symbol=symbol, force=force)
+    color_jobs[job.id] = job
+
+    task = asyncio.create_task(ColorPipeline(job).run())
+    # Держим ссылку, иначе задачу может собрать сборщик мусора
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
@@ -1,3 +1,4 @@
+from sqlalchemy import Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core.database import Base
@@ -16,4 +17,15 @@ class Stock(Base):
     emitent_inn: Mapped[str] = mapped_column(nullable=True)
     emitent_okpo: Mapped[str] = mapped_column(nullable=True)
     board: Mapped[str] = mapped_column(nullable=True)  # из primary_boardid
-    dominant_color: Mapped[str] = mapped_column(nullable=True)
\ No newline at end of file
+    dominant_color: Mapped[str] = mapped_column(nullable=True)
+    logo_hash: Mapped[str] = mapped_column(nullable=True)  # sha256 SVG, из которого посчитан цвет
+
+    __table_args__ = (
+        # Триграммные индексы под LIKE '%q%' поиска (нужно расширение pg_trgm).
+        # create_all не добавляет индексы в существующую таблицу, на старой БД:
+        #   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        #   CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_stocks_symbol_trgm ON stocks USING gin (lower(symbol) gin_trgm_ops);
+        #   CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_stocks_shortname_trgm ON stocks USING gin (lower(shortname) gin_trgm_ops);
+        Index("ix_stocks_symbol_trgm", text("lower(symbol) gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_stocks_shortname_trgm", text("lower(shortname) gin_trgm_ops"), postgresql_using="gin"),
+    )
@@ -1,8 +1,23 @@
-from sqlalchemy import select, or_, func, update
+from sqlalchemy import bindparam, select, or_, func, literal_column, update
+from sqlalchemy.dialects.postgresql import insert
 
 from src.core.repository import BaseRepository
 from src.modules.stocks.models import Stock
-from src.modules.stocks.schemas import StockOut
+from src.modules.stocks.schemas import CatalogUpsertOut, StockOut
+
+
+# Поля каталога из ответа ISS /securities.json: колонка модели -> поле ISS
+CATALOG_FIELDS = {
+    "shortname": "shortname",
+    "regnumber": "regnumber",
+    "name": "name",
+    "isin": "isin",
+    "emitent_title": "emitent_title",
+    "emitent_inn": "emitent_inn",
+    "emitent_okpo": "emitent_okpo",
+    "board": "primary_boardid",
+}
+CATALOG_CHUNK_SIZE = 1000
 
 
 class StockRepository(BaseRepository):
@@ -14,39 +29,69 @@ class StockRepository(BaseRepository):
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
-    async def upsert_many(self, stock_data: list[dict]):
+    async def upsert_many(self, stock_data: list[dict], chunk_size: int = CATALOG_CHUNK_SIZE) -> CatalogUpsertOut:
+        """
+        Каталог бумаг пачками через INSERT ... ON CONFLICT (symbol) DO UPDATE.
+
+        Строка переписывается, только если какое-то поле действительно
+        изменилось (IS DISTINCT FROM), поэтому повторная синхронизация без
+        изменений не порождает ни одной новой версии строки.
+        """
+        # ON CONFLICT не может затронуть одну строку дважды в одном запросе
+        unique = {}
         for data in stock_data:
             symbol = data.get("secid")
-            stmt = select(self.model).filter_by(symbol=symbol)
-            existing = await self.session.execute(stmt)
-            stock = existing.scalars().first()
-
-            values = {
-                "shortname": data.get("shortname"),
-                "regnumber": data.get("regnumber"),
-                "name": data.get("name"),
-                "isin": data.get("isin"),
-                "emitent_title": data.get("emitent_title"),
-                "emitent_inn": data.get("emitent_inn"),
-                "emitent_okpo": data.get("emitent_okpo"),
-                "board": data.get("primary_boardid"),
-            }
-
-            if stock:
-                for key, value in values.items():
-                    setattr(stock, key, value)
-            else:
-                self.session.add(self.model(symbol=symbol, **values))
-
-    async def search_by_text(self, query: str):
+            if symbol:
+                unique[symbol] = {"symbol": symbol, **{col: data.get(key) for col, key in CATALOG_FIELDS.items()}}
+        rows = list(unique.values())
+        stats = CatalogUpsertOut()
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            stmt = insert(self.model).values(chunk)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[self.model.symbol],
+                set_={col: stmt.excluded[col] for col in CATALOG_FIELDS},
+                where=or_(*(
+                    getattr(self.model, col).is_distinct_from(stmt.excluded[col]) for col in CATALOG_FIELDS
+                )),
+            )
+
+            # Неизменённые строки RETURNING не возвращает; xmax = 0 — вставка, иначе обновление
+            result = await self.session.execute(stmt.returning(literal_column("xmax = 0")))
+            flags = result.scalars().all()
+            inserted = sum(1 for is_new in flags if is_new)
+            stats.inserted += inserted
+            stats.updated += len(flags) - inserted
+            stats.unchanged += len(chunk) - len(flags)
+
+        return stats
+
+    async def search_by_text(self, query: str, board: str | None = None, limit: int | None = None):
+        q = query.lower()
+        symbol, shortname = func.lower(self.model.symbol), func.lower(self.model.shortname)
         stmt = select(self.model).where(
             or_(
-                func.lower(self.model.symbol).like(f"%{query.lower()}%"),
-                func.lower(self.model.shortname).like(f"%{query.lower()}%")
+                symbol.like(f"%{q}%"),
+                shortname.like(f"%{q}%")
             )
         )
+        if board:
+            stmt = stmt.where(self.model.board == board)
+        if limit:
+            # Релевантность — позиция совпадения в тикере или названии, как в поиске в памяти
+            position = func.least(
+                func.nullif(func.strpos(symbol, q), 0),
+                func.nullif(func.strpos(shortname, q), 0),
+            )
+            stmt = stmt.order_by(position, self.model.id).limit(limit)
         result = await self.session.execute(stmt)
         return result.scalars().all()
+
+    async def get_search_entries(self, board: str) -> list[tuple[int, str, str | None]]:
+        stmt = select(self.model.id, self.model.symbol, self.model.shortname).where(self.model.board == board)
+        result = await self.session.execute(stmt)
+        return result.all()
     
 
     async def update_color(self, symbol: str, color: str):
@@ -61,4 +106,29 @@ class StockRepository(BaseRepository):
     async def get_symbol_by_id(self, stock_id: int) -> str | None:
         query = select(self.model.symbol).where(self.model.id == stock_id)
         result = await self.session.execute(query)
-        return result.scalar_one_or_none()
\ No newline at end of file
+        return result.scalar_one_or_none()
+
+    async def get_symbols_by_ids(self, stock_ids: list[int]) -> dict[int, str]:
+        query = select(self.model.id, self.model.symbol).where(self.model.id.in_(stock_ids))
+        result = await self.session.execute(query)
+        return dict(result.all())
+
+    async def get_color_sources(self, symbol: str | None = None) -> list[tuple[str, str | None, str | None]]:
+        """(symbol, logo_hash, dominant_color) — всё, что нужно пайплайну цветов, без полных объектов."""
+        stmt = select(self.model.symbol, self.model.logo_hash, self.model.dominant_color).order_by(self.model.id)
+        if symbol:
+            stmt = stmt.where(self.model.symbol == symbol)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def update_colors(self, colors: list[tuple[str, str, str]]) -> None:
+        """Цвета и хэши логотипов по symbol одним executemany."""
+        if not colors:
+            return
+        table = self.model.__table__
+        await self.session.execute(
+            update(table)
+            .where(table.c.symbol == bindparam("s"))
+            .values(dominant_color=bindparam("c"), logo_hash=bindparam("h")),
+            [{"s": symbol, "c": color, "h": logo_hash} for symbol, color, logo_hash in colors],
+        )
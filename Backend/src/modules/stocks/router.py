@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.database import get_async_session
 from src.core.dependencies import PaginationDep, UserIdDep
 from src.modules.stocks.service import StockService
-from src.modules.stocks.schemas import StockOut, StockSearchOut, StockUpdate
+from src.modules.stocks.schemas import ColorJobOut, StockOut, StockSearchOut, StockUpdate
 
 
 router = APIRouter(prefix="/stocks", tags=["Stocks"])
@@ -14,12 +14,18 @@ router = APIRouter(prefix="/stocks", tags=["Stocks"])
 async def list_stocks(
     user_id: UserIdDep,
     pagination: PaginationDep,
+    response: Response,
+    after_id: int | None = Query(None, description="Keyset-пагинация: акции с id больше указанного"),
+    with_total: bool = Query(False, description="Вернуть общее число акций в заголовке X-Total-Count"),
     session: AsyncSession = Depends(get_async_session),
 ):
     service = StockService(session)
+    if with_total:
+        response.headers["X-Total-Count"] = str(await service.count())
     return await service.get_all(
         skip=(pagination.page_number - 1) * (pagination.page_size or 10),
-        limit=pagination.page_size or 10
+        limit=pagination.page_size or 10,
+        after_id=after_id,
     )
 
 
@@ -78,19 +84,41 @@ async def delete_stock(
 @router.post("/parse-stocks-moex")
 async def pars_stocks_moex(
     user_id: UserIdDep,
+    dry_run: bool = Query(False, description="Посчитать изменения без записи в БД"),
     session: AsyncSession = Depends(get_async_session)
 ):
     service = StockService(session)
-    count = await service.pars_stocks_moex()
-    return {"status": "ok", "synced": count}
-
-
-@router.post("/recalculate-colors")
+    report = await service.pars_stocks_moex(dry_run=dry_run)
+    return {
+        "status": "ok",
+        "synced": report.accepted,
+        "dry_run": report.dry_run,
+        "pages": report.pages,
+        "skipped": report.skipped,
+        **report.written.model_dump(),
+        "elapsed": round(report.wall_time, 3),
+    }
+
+
+@router.post("/recalculate-colors", response_model=ColorJobOut, status_code=status.HTTP_202_ACCEPTED)
 async def recalc_colors(
     user_id: UserIdDep,
     symbol: str | None = Query(None),
+    force: bool = Query(False, description="Пересчитать и для неизменившихся логотипов"),
     session: AsyncSession = Depends(get_async_session)
 ):
     service = StockService(session)
-    count = await service.recalculate_dominant_color(symbol)
-    return {"status": "ok", "updated": count}
+    return service.recalculate_dominant_color(symbol, force)
+
+
+@router.get("/recalculate-colors/{job_id}", response_model=ColorJobOut)
+async def get_colors_job(
+    user_id: UserIdDep,
+    job_id: int,
+    session: AsyncSession = Depends(get_async_session)
+):
+    service = StockService(session)
+    try:
+        return service.get_color_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
 
 
 class StockBase(BaseModel):
@@ -22,6 +23,30 @@ class StockOut(StockBase):
     dominant_color: str | None = None
 
 
+class ColorJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    symbol: str | None = None
+    force: bool
+    status: str
+    total: int
+    processed: int
+    updated: int
+    unchanged: int
+    failed: int
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+    elapsed: float
+
+
+class CatalogUpsertOut(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
 class StockSearchOut(BaseModel):
     id: int
     symbol: str
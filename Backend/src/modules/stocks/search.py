@@ -0,0 +1,78 @@
+from src.modules.stocks.schemas import StockSearchOut
+
+
+SEARCH_BOARD = "TQBR"
+SEARCH_LIMIT = 6
+MAX_PREFIX = 16  # глубже префиксы не индексируем — такие запросы идут полным просмотром
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.top: list[StockSearchOut] = []
+
+
+# Поиск тикеров в памяти: ранжирование как в search_stocks (позиция совпадения, затем id).
+# В узлах префиксного дерева заранее отобраны первые limit по id; если их меньше —
+# полный просмотр (инструментов режима — сотни)
+class StockSearchIndex:
+
+    def __init__(self, limit: int = SEARCH_LIMIT):
+        self.limit = limit
+        self._root = _Node()
+        self._entries: list[tuple[str, str, StockSearchOut]] = []
+        self.is_built = False
+
+    def rebuild(self, stocks: list[StockSearchOut]) -> None:
+        root = _Node()
+        entries = []
+        # В порядке id: первые ``limit`` попавших в узел и есть его top-k
+        for stock in sorted(stocks, key=lambda s: s.id):
+            symbol, name = (stock.symbol or "").lower(), (stock.shortname or "").lower()
+            entries.append((symbol, name, stock))
+            for key in (symbol, name):
+                node = root
+                for ch in key[:MAX_PREFIX]:
+                    node = node.children.setdefault(ch, _Node())
+                    if len(node.top) < self.limit and stock not in node.top:
+                        node.top.append(stock)
+
+        self._root, self._entries = root, entries
+        self.is_built = True
+
+    def search(self, text: str) -> list[StockSearchOut]:
+        q = text.lower()
+        if not q:
+            return []
+
+        if len(q) <= MAX_PREFIX:
+            node = self._root
+            for ch in q:
+                node = node.children.get(ch)
+                if node is None:
+                    break
+            else:
+                if len(node.top) == self.limit:
+                    return list(node.top)
+
+        return self._scan(q)
+
+    def _scan(self, q: str) -> list[StockSearchOut]:
+        ranked = []
+        for symbol, name, stock in self._entries:
+            symbol_pos, name_pos = symbol.find(q), name.find(q)
+            if symbol_pos < 0 and name_pos < 0:
+                continue
+            pos = min(p for p in (symbol_pos, name_pos) if p >= 0)
+            ranked.append((pos, stock.id, stock))
+
+        ranked.sort(key=lambda r: (r[0], r[1]))
+        return [stock for _, _, stock in ranked[:self.limit]]
+
+    def stats(self) -> dict:
+        return {"stocks": len(self._entries), "built": self.is_built}
+
+
+search_index = StockSearchIndex()
@@ -1,28 +1,9 @@
-import os, ctypes
-CAIRO_DIR = r"C:\Program Files\GTK3-Runtime Win64\bin"
-os.add_dll_directory(CAIRO_DIR)
-ctypes.CDLL(os.path.join(CAIRO_DIR, "libcairo-2.dll"))
-
-from PIL import Image
-from io import BytesIO
-from fastapi import requests
-import httpx
-import cairosvg
-
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.modules.stocks.catalog import CatalogIngest, CatalogIngestReport
+from src.modules.stocks.colors import ColorJob, color_jobs, start_color_job
 from src.modules.stocks.repository import StockRepository
 from src.modules.stocks.schemas import StockSearchOut, StockUpdate, StockOut
-
-
-def get_dominant_color_hex(img: Image.Image) -> str:
-    img = img.convert("RGB").resize((64, 64))
-    pixels = list(img.getdata())
-    by_color = {}
-    for r, g, b in pixels:
-        key = (r, g, b)
-        by_color[key] = by_color.get(key, 0) + 1
-    dominant = max(by_color, key=by_color.get)
-    return '#%02x%02x%02x' % dominant
+from src.modules.stocks.search import SEARCH_BOARD, SEARCH_LIMIT, search_index
 
 
 class StockService:
@@ -31,9 +12,12 @@ class StockService:
         self.session = session
 
 
-    async def get_all(self, skip: int, limit: int) -> list[StockOut]:
-        all_stocks = await self.repo.get_all()
-        return all_stocks[skip:skip+limit]
+    async def get_all(self, skip: int, limit: int, after_id: int | None = None) -> list[StockOut]:
+        return await self.repo.get_page(limit=limit, offset=skip, after_id=after_id)
+
+
+    async def count(self) -> int:
+        return await self.repo.count()
 
 
     async def get_one(self, stock_id: int) -> StockOut:
@@ -45,94 +29,57 @@ class StockService:
 
     async def update(self, stock_id: int, data: StockUpdate) -> StockOut:
         await self.repo.edit(data, id=stock_id, is_patch=True)
-        return await self.get_one(stock_id)
+        stock = await self.get_one(stock_id)
+        await self.rebuild_search_index()
+        return stock
 
 
     async def delete(self, stock_id: int) -> None:
         await self.repo.delete(id=stock_id)
+        await self.rebuild_search_index()
 
 
-    async def pars_stocks_moex(self) -> int:
-        url = "https://iss.moex.com/iss/securities.json"
-        params = {
-            "engine": "stock",
-            "market": "shares",
-            "is_trading": 1,
-            "start": 0
-        }
-
-        all_rows = []
-        while True:
-            r = requests.get(url, params=params)
-            r.raise_for_status()
-            data = r.json()
-
-            columns = data["securities"]["columns"]
-            rows = data["securities"]["data"]
-            if not rows:
-                break
+    async def pars_stocks_moex(self, dry_run: bool = False) -> CatalogIngestReport:
+        report = await CatalogIngest(self.session, dry_run=dry_run).run()
+        if not dry_run:
+            await self.rebuild_search_index()
+        return report
 
-            for row in rows:
-                item = dict(zip(columns, row))
-                secid = item.get("secid")
-                if isinstance(secid, str) and not secid.startswith("RU0"):
-                    all_rows.append(item)
 
-            params["start"] += len(rows)
+    async def search_stocks(self, text: str) -> list[StockSearchOut]:
+        # Основной путь — индекс в памяти, без запроса к БД
+        if search_index.is_built:
+            return search_index.search(text)
 
-        await self.repo.upsert_many(all_rows)
-        await self.session.commit()
-        return len(all_rows)
+        # Индекс ещё не построен: ранжирование и LIMIT в SQL (триграммные индексы)
+        stocks = await self.repo.search_by_text(text, board=SEARCH_BOARD, limit=SEARCH_LIMIT)
+        return [
+            StockSearchOut(id=s.id, symbol=s.symbol, shortname=s.shortname)
+            for s in stocks
+        ]
 
 
-    async def search_stocks(self, text: str) -> list[StockSearchOut]:
-        stocks = await self.repo.search_by_text(text)
-
-        # Фильтрация по TQBR
-        filtered = [
-            s for s in stocks
-            if s.board == "TQBR" and (
-                text.lower() in (s.symbol or "").lower() or
-                text.lower() in (s.shortname or "").lower()
-            )
-        ]
+    async def rebuild_search_index(self) -> None:
+        entries = await self.repo.get_search_entries(SEARCH_BOARD)
+        search_index.rebuild([
+            StockSearchOut(id=stock_id, symbol=symbol, shortname=shortname)
+            for stock_id, symbol, shortname in entries
+        ])
 
-        # Сортировка по релевантности (по позиции совпадения)
-        def relevance(stock):
-            symbol_pos = (stock.symbol or "").lower().find(text.lower())
-            name_pos = (stock.shortname or "").lower().find(text.lower())
-            symbol_pos = symbol_pos if symbol_pos >= 0 else 999
-            name_pos = name_pos if name_pos >= 0 else 999
-            return min(symbol_pos, name_pos), stock.id
 
-        sorted_results = sorted(filtered, key=relevance)
+    def recalculate_dominant_color(self, symbol: str | None = None, force: bool = False) -> ColorJob:
+        """Запускает пересчёт цветов фоновой задачей и сразу возвращает её."""
+        return start_color_job(symbol, force)
 
-        return [
-            StockSearchOut(id=s.id, symbol=s.symbol, shortname=s.shortname)
-            for s in sorted_results[:6]
-        ]
 
+    def get_color_job(self, job_id: int) -> ColorJob:
+        """
+        Статус задачи пересчёта цветов.
 
-    async def recalculate_dominant_color(self, symbol: str | None = None) -> int:
-        stocks = await self.repo.get_all()
-        if symbol:
-            stocks = [s for s in stocks if s.symbol == symbol]
-        updated = 0
-        async with httpx.AsyncClient() as client:
-            for stock in stocks:
-                url = f"https://finrange.com/storage/companies/logo/svg/MOEX_{stock.symbol}.svg"
-                try:
-                    r = await client.get(url)
-                    r.raise_for_status()
-
-                    # конвертация SVG → PNG
-                    png_bytes = cairosvg.svg2png(bytestring=r.content)
-                    img = Image.open(BytesIO(png_bytes))
-                    color = get_dominant_color_hex(img)
-
-                    await self.repo.update_color(stock.symbol, color)
-                    updated += 1
-                except Exception as e:
-                    print(f"[!] Ошибка обработки {stock.symbol}: {e}")
-        await self.session.commit()
-        return updated
\ No newline at end of file
+        Задачи хранятся только в памяти процесса, который их запустил:
+        на другом воркере или после перезапуска задача не найдётся.
+        """
+        job = color_jobs.get(job_id)
+        if not job:
+            raise ValueError("Задача не найдена")
+        return job
@@ -20,4 +20,7 @@ class OneSignalToken(Base):
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     player_id: Mapped[str] = mapped_column(nullable=False, unique=True)
-    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
\ No newline at end of file
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    # Активная подписка OneSignal для player_id — чтобы не запрашивать её перед каждым push
+    subscription_id: Mapped[str | None] = mapped_column(nullable=True)
+    subscription_updated_at: Mapped[datetime | None] = mapped_column(nullable=True)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 from pydantic import EmailStr
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.dialects.postgresql import insert
 
 from src.core.repository import BaseRepository
@@ -34,7 +34,13 @@ class OneSignalTokenRepository(BaseRepository):
             .values(user_id=user_id, player_id=player_id)
             .on_conflict_do_update(
                 index_elements=[self.model.user_id],
-                set_={"player_id": player_id, "updated_at": datetime.utcnow()}
+                # Новый player_id — прежняя подписка к нему уже не относится
+                set_={
+                    "player_id": player_id,
+                    "updated_at": datetime.utcnow(),
+                    "subscription_id": None,
+                    "subscription_updated_at": None,
+                },
             )
         )
         await self.session.execute(stmt)
@@ -43,3 +49,25 @@ class OneSignalTokenRepository(BaseRepository):
         query = select(self.model.player_id).where(self.model.user_id == user_id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
+
+    async def get_push_targets(self, user_ids: list[int]) -> dict[int, tuple[str, str | None]]:
+        """user_id -> (player_id, subscription_id) одним запросом."""
+        query = (
+            select(self.model.user_id, self.model.player_id, self.model.subscription_id)
+            .where(self.model.user_id.in_(user_ids))
+        )
+        result = await self.session.execute(query)
+        return {user_id: (player_id, sub_id) for user_id, player_id, sub_id in result.all()}
+
+    async def set_subscription_ids(self, subscriptions: dict[str, str | None]) -> None:
+        """Сохраняет подписки по player_id одним executemany."""
+        if not subscriptions:
+            return
+        # Core-таблица: ORM-режим executemany допускает только UPDATE по первичному ключу
+        table = self.model.__table__
+        await self.session.execute(
+            update(table)
+            .where(table.c.player_id == bindparam("p_id"))
+            .values(subscription_id=bindparam("s_id"), subscription_updated_at=datetime.utcnow()),
+            [{"p_id": p, "s_id": s} for p, s in subscriptions.items()],
+        )
@@ -1,13 +1,12 @@
-from fastapi import APIRouter, HTTPException, Request, status, Depends
-import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from src.core.database import get_async_session
-from src.core.dependencies import get_current_user_id
+from src.core.dependencies import PaginationDep, get_current_user_id
 from src.modules.users.service import UserService
 from src.modules.users.schemas import OneSignalTokenIn, User, UserUpdate
-from src.core.config import settings
+from src.modules.notify.onesignal import onesignal
 
 
 router = APIRouter(
@@ -29,9 +28,24 @@ async def get_user(
 
 
 @router.get("/", response_model=list[User])
-async def list_users(session: AsyncSession = Depends(get_async_session)):
+async def list_users(
+    pagination: PaginationDep,
+    response: Response,
+    after_id: int | None = Query(None, description="Keyset-пагинация: пользователи с id больше указанного"),
+    with_total: bool = Query(False, description="Вернуть общее число пользователей в заголовке X-Total-Count"),
+    session: AsyncSession = Depends(get_async_session),
+):
     service = UserService(session)
-    return await service.list_users()
+    if with_total:
+        response.headers["X-Total-Count"] = str(await service.count_users())
+    if pagination.page_size is None:
+        # Без page_size, как и раньше, отдаём всех пользователей
+        return await service.list_users(after_id=after_id)
+    return await service.list_users(
+        skip=(pagination.page_number - 1) * pagination.page_size,
+        limit=pagination.page_size,
+        after_id=after_id,
+    )
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -85,38 +99,23 @@ async def send_test_push(
     if not player_id:
         raise HTTPException(status_code=404, detail="player_id not found")
 
-    async with httpx.AsyncClient() as client:
-        # Получение subscription_id через OneSignal API v2
-        url = f"https://api.onesignal.com/apps/{settings.PROJECT_ID}/users/by/onesignal_id/{player_id}"
-        headers = {"Authorization": f"Bearer {settings.ONESIGNAL_API_KEY}"}
-        user_response = await client.get(url, headers=headers)
-
-        if user_response.status_code != 200:
-            raise HTTPException(status_code=502, detail="Failed to get subscription_id")
-
-        user_data = user_response.json()
-        subscriptions = user_data.get("subscriptions")
-        if not subscriptions:
-            raise HTTPException(status_code=404, detail="No subscriptions found")
-
-        subscription_id = subscriptions[0]["id"]
-
-        # Отправка push через API v2
-        push_url = "https://api.onesignal.com/notifications?c=push"
-        push_headers = {
-            "Authorization": f"Bearer {settings.ONESIGNAL_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        push_body = {
-            "app_id": settings.PROJECT_ID,
-            "include_subscription_ids": [subscription_id],
-            "headings": {"en": "Test Push"},
-            "contents": {"en": "This is a test push notification"}
-        }
-
-        push_response = await client.post(push_url, headers=push_headers, json=push_body)
-
-        if push_response.status_code >= 400:
-            raise HTTPException(status_code=502, detail="Push send failed")
-
-    return {"status": "ok", "push_id": push_response.json().get("id")}
+    # Получение subscription_id через OneSignal API v2
+    subscriptions = await onesignal.get_subscriptions(player_id)
+    if subscriptions is None:
+        raise HTTPException(status_code=502, detail="Failed to get subscription_id")
+    if not subscriptions:
+        raise HTTPException(status_code=404, detail="No subscriptions found")
+
+    subscription_id = subscriptions[0]["id"]
+
+    # Отправка push через API v2
+    result = await onesignal.send(
+        [subscription_id],
+        headings={"en": "Test Push"},
+        contents={"en": "This is a test push notification"},
+    )
+
+    if not result.ok:
+        raise HTTPException(status_code=502, detail="Push send failed")
+
+    return {"status": "ok", "push_id": result.notification_id}
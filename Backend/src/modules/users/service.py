@@ -1,4 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.modules.notify.onesignal import onesignal
+from src.modules.notify.subscriptions import PushTarget, push_targets
 from src.modules.users.repository import OneSignalTokenRepository, UserRepository
 from src.modules.users.schemas import User, UserUpdate
 
@@ -12,8 +14,11 @@ class UserService:
         user = await self.repo.get_one_or_none(id=user_id)
         return user
 
-    async def list_users(self) -> list[User]:
-        return await self.repo.get_all()
+    async def list_users(self, skip: int = 0, limit: int | None = None, after_id: int | None = None) -> list[User]:
+        return await self.repo.get_page(limit=limit, offset=skip, after_id=after_id)
+
+    async def count_users(self) -> int:
+        return await self.repo.count()
 
     async def delete_user(self, user_id: int) -> None:
         await self.repo.delete(id=user_id)
@@ -24,4 +29,14 @@ class UserService:
         return updated_user
     
     async def register_onesignal_token(self, user_id: int, player_id: str):
-        await self.onesignal_repo.upsert(user_id, player_id)
\ No newline at end of file
+        await self.onesignal_repo.upsert(user_id, player_id)
+
+        # Подписку запрашиваем сразу, чтобы отправка push обходилась одним запросом к OneSignal
+        try:
+            subscription_id = await onesignal.get_subscription_id(player_id)
+        except Exception as e:
+            print(f"[!] Не удалось получить подписку OneSignal для {player_id}: {e}")
+            subscription_id = None
+
+        await self.onesignal_repo.set_subscription_ids({player_id: subscription_id})
+        push_targets.put(user_id, PushTarget(player_id, subscription_id))
\ No newline at end of file
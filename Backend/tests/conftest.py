@@ -0,0 +1,33 @@
+import os
+
+# Настройки обязательны при импорте src.core.config; в тестах БД не нужна
+for key, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "DB_NAME": "test",
+    "JWT_SECRET_KEY": "test-secret",
+    "JWT_ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "REFRESH_TOKEN_EXPIRE_MINUTES": "1440",
+    "PROJECT_ID": "test-app",
+    "ONESIGNAL_API_KEY": "test-key",
+}.items():
+    os.environ.setdefault(key, value)
+
+import pytest
+
+from tests.fake_servers import FakeISS, FakeOneSignal
+
+
+@pytest.fixture
+def fake_iss():
+    with FakeISS() as server:
+        yield server
+
+
+@pytest.fixture
+def fake_onesignal():
+    with FakeOneSignal() as server:
+        yield server
@@ -0,0 +1,107 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeServer:
+    """Локальный HTTP-сервер в отдельном потоке: маршруты (метод, путь) → обработчик."""
+
+    def __init__(self):
+        self.requests: list[tuple[str, str, dict, dict | None]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self, method: str):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                server.requests.append((method, url.path, query, body))
+
+                status, payload = server.route(method, url.path, query, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def route(self, method: str, path: str, query: dict, body: dict | None) -> tuple[int, dict]:
+        return 404, {}
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class FakeISS(FakeServer):
+    """ISS: снимок marketdata режима торгов из фикстуры (или подменённый в тесте)."""
+
+    def __init__(self):
+        super().__init__()
+        self.marketdata = json.loads((FIXTURES / "iss_marketdata_tqbr.json").read_text())
+
+    def route(self, method, path, query, body):
+        if method == "GET" and path.endswith("/boards/TQBR/securities.json"):
+            return 200, self.marketdata
+        return 404, {}
+
+
+class FakeOneSignal(FakeServer):
+    """OneSignal API v2: подписки по onesignal_id и отправка уведомлений."""
+
+    def __init__(self):
+        super().__init__()
+        self.subscriptions: dict[str, list[dict]] = {}  # player_id → подписки
+        self.rejected: set[str] = set()  # subscription_id, которые OneSignal отклонит
+        self.send_status = 200
+
+    @property
+    def notifications(self) -> list[dict]:
+        return [body for method, path, _, body in self.requests if method == "POST" and path == "/notifications"]
+
+    @property
+    def lookups(self) -> list[str]:
+        return [path.rsplit("/", 1)[1] for method, path, _, _ in self.requests if "/users/by/onesignal_id/" in path]
+
+    def route(self, method, path, query, body):
+        if method == "GET" and "/users/by/onesignal_id/" in path:
+            player_id = path.rsplit("/", 1)[1]
+            if player_id not in self.subscriptions:
+                return 404, {"errors": [{"title": "User not found"}]}
+            return 200, {"subscriptions": self.subscriptions[player_id]}
+
+        if method == "POST" and path == "/notifications":
+            if self.send_status >= 400:
+                return self.send_status, {"errors": ["Internal server error"]}
+            sub_ids = body["include_subscription_ids"]
+            invalid = [s for s in sub_ids if s in self.rejected]
+            if len(invalid) == len(sub_ids):
+                return 200, {"id": "", "errors": ["All included players are not subscribed"]}
+            payload = {"id": f"n{len(self.notifications)}"}
+            if invalid:
+                payload["errors"] = {"invalid_player_ids": invalid}
+            return 200, payload
+
+        return 404, {}
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.modules.notify import service
+from src.modules.notify.delivery import DeliveryReport
+from src.modules.notify.index import AlertIndex, IndexedAlert
+from src.modules.notify.schemas import TriggeredAlert
+from src.modules.notify.service import AlertService
+from src.modules.notify.subscriptions import PushTargetCache
+
+
+NOW = datetime(2024, 5, 6, 12)
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeAlertRepository:
+    def __init__(self, active: set[int]):
+        self.active = set(active)
+        self.claimed: list[int] = []
+
+    async def claim(self, triggered: list[tuple[int, datetime]]) -> set[int]:
+        claimed = {alert_id for alert_id, _ in triggered if alert_id in self.active}
+        self.active -= claimed
+        self.claimed.extend(claimed)
+        return claimed
+
+    async def release(self, alert_ids: list[int]) -> None:
+        self.active |= set(alert_ids)
+
+
+class FakeTokenRepository:
+    def __init__(self, tokens: dict[int, tuple[str, str | None]]):
+        self.tokens = tokens
+
+    async def get_push_targets(self, user_ids: list[int]):
+        return {u: self.tokens[u] for u in user_ids if u in self.tokens}
+
+    async def set_subscription_ids(self, subscriptions: dict[str, str | None]) -> None:
+        pass
+
+
+class FakeStockRepository:
+    async def get_symbols_by_ids(self, stock_ids: list[int]) -> dict[int, str]:
+        return {stock_id: f"S{stock_id}" for stock_id in stock_ids}
+
+
+def triggered(alert_id: int, user_id: int) -> TriggeredAlert:
+    return TriggeredAlert(alert_id=alert_id, user_id=user_id, stock_id=1, condition="above",
+                          value=100, close=101, date=NOW)
+
+
+def make_service(monkeypatch, active: set[int], delivery) -> tuple[AlertService, AlertIndex]:
+    index = AlertIndex()
+    index.rebuild([
+        IndexedAlert(alert_id=i, user_id=i, stock_id=1, condition="above", value=100)
+        for i in (1, 2, 3, 4)
+    ])
+    monkeypatch.setattr(service, "alert_index", index)
+    monkeypatch.setattr(service, "push_targets", PushTargetCache(maxsize=100, ttl=60))
+    monkeypatch.setattr(service, "PushDelivery", lambda: delivery)
+
+    svc = AlertService(FakeSession())
+    svc.repo = FakeAlertRepository(active)
+    svc.onesignal_repo = FakeTokenRepository({1: ("p1", "s1"), 2: ("p2", "s2"), 3: ("p3", "s3")})
+    svc.stock_repo = FakeStockRepository()
+    return svc, index
+
+
+class FailingDelivery:
+    async def deliver(self, items):
+        raise RuntimeError("OneSignal недоступен")
+
+
+class RecordingDelivery:
+    def __init__(self):
+        self.items = []
+
+    async def deliver(self, items):
+        self.items = items
+        return DeliveryReport(total=len(items), delivered=[(i.alert_id, i.date) for i in items])
+
+
+def test_failed_delivery_releases_claimed_alerts(monkeypatch):
+    svc, index = make_service(monkeypatch, active={1, 2, 3}, delivery=FailingDelivery())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(svc._deliver([triggered(1, 1), triggered(2, 2)]))
+
+    assert svc.repo.active == {1, 2, 3}
+    assert svc.session.rollbacks == 1
+    assert {a.alert_id for a in index.match(1, 101)} == {1, 2, 3, 4}
+
+
+def test_users_without_token_are_not_claimed(monkeypatch):
+    delivery = RecordingDelivery()
+    svc, index = make_service(monkeypatch, active={1, 4}, delivery=delivery)
+
+    report = asyncio.run(svc._deliver([triggered(1, 1), triggered(4, 4)]))
+
+    assert [i.alert_id for i in delivery.items] == [1]
+    assert svc.repo.claimed == [1]
+    assert len(report.delivered) == 1
+    # У пользователя 4 нет токена: алерт активен и остаётся в индексе
+    assert 4 in svc.repo.active
+    assert {a.alert_id for a in index.match(1, 101)} == {2, 3, 4}
+
+
+def test_alerts_claimed_elsewhere_leave_the_index(monkeypatch):
+    delivery = RecordingDelivery()
+    # Алерт 2 уже забрала другая проверка
+    svc, index = make_service(monkeypatch, active={1}, delivery=delivery)
+
+    asyncio.run(svc._deliver([triggered(1, 1), triggered(2, 2)]))
+
+    assert [i.alert_id for i in delivery.items] == [1]
+    assert {a.alert_id for a in index.match(1, 101)} == {3, 4}
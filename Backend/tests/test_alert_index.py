@@ -0,0 +1,67 @@
+from src.modules.notify.index import AlertIndex, IndexedAlert
+
+
+def alert(alert_id: int, condition: str, value: float, stock_id: int = 1) -> IndexedAlert:
+    return IndexedAlert(alert_id=alert_id, user_id=1, stock_id=stock_id, condition=condition, value=value)
+
+
+def ids(alerts) -> set[int]:
+    return {a.alert_id for a in alerts}
+
+
+def test_match_above_and_below_inclusive():
+    index = AlertIndex()
+    index.rebuild([
+        alert(1, "above", 100),
+        alert(2, "above", 110),
+        alert(3, "below", 90),
+        alert(4, "below", 100),
+        alert(5, "above", 50, stock_id=2),
+    ])
+
+    assert ids(index.match(1, 100)) == {1, 4}
+    assert ids(index.match(1, 95)) == {4}
+    assert ids(index.match(1, 120)) == {1, 2}
+    assert ids(index.match(1, 80)) == {3, 4}
+    assert ids(index.match(3, 100)) == set()
+
+
+def test_equal_thresholds_are_kept_separately():
+    index = AlertIndex()
+    index.rebuild([alert(1, "above", 100), alert(2, "above", 100)])
+
+    index.remove(1)
+
+    assert ids(index.match(1, 100)) == {2}
+
+
+def test_remove_and_readd():
+    index = AlertIndex()
+    index.rebuild([alert(1, "above", 100), alert(2, "below", 90)])
+
+    index.remove(1)
+    index.remove(1)  # повторное удаление не ломает индекс
+    assert ids(index.match(1, 150)) == set()
+    assert len(index) == 1
+
+    index.add(alert(1, "above", 100))
+    assert ids(index.match(1, 150)) == {1}
+
+
+def test_add_replaces_alert_with_same_id():
+    index = AlertIndex()
+    index.add(alert(1, "above", 100))
+    index.add(alert(1, "below", 80))
+
+    assert len(index) == 1
+    assert ids(index.match(1, 150)) == set()
+    assert ids(index.match(1, 70)) == {1}
+
+
+def test_rebuild_replaces_contents():
+    index = AlertIndex()
+    index.rebuild([alert(1, "above", 100)])
+    index.rebuild([alert(2, "below", 100, stock_id=2)])
+
+    assert index.match(1, 200) == []
+    assert index.stats() == {"alerts": 1, "stocks": 1, "built": True}
@@ -0,0 +1,66 @@
+import json
+import math
+
+from src.modules.stock_prices.parsing import CandleBatch, _to_epoch, parse_candles_page, to_datetime
+
+
+COLUMNS = ["open", "close", "high", "low", "value", "volume", "begin", "end"]
+
+
+def page(*rows) -> bytes:
+    return json.dumps({"candles": {"columns": COLUMNS, "data": list(rows)}}).encode()
+
+
+def row(begin: str, price: float = 100.0, volume: float | None = 10.0):
+    return [price, price + 1, price + 2, price - 1, 1000.0, volume, begin, begin]
+
+
+def test_to_epoch_matches_datetime():
+    assert to_datetime(_to_epoch("2024-03-01 10:00:00")).isoformat() == "2024-03-01T10:00:00"
+    assert _to_epoch("1970-01-02 00:00:01") == 86401
+
+
+def test_parse_transposes_rows_into_columns():
+    batch = parse_candles_page(page(row("2024-03-01 10:00:00"), row("2024-03-01 11:00:00", price=200.0)))
+
+    assert len(batch) == 2
+    assert list(batch.open) == [100.0, 200.0]
+    assert list(batch.close) == [101.0, 201.0]
+    assert list(batch.low) == [99.0, 199.0]
+    assert [to_datetime(ts).hour for ts in batch.timestamps] == [10, 11]
+
+
+def test_parse_drops_rows_without_ohlc():
+    broken = row("2024-03-01 11:00:00")
+    broken[COLUMNS.index("high")] = None
+    no_begin = row("")
+
+    batch = parse_candles_page(page(row("2024-03-01 10:00:00"), broken, no_begin, row("2024-03-01 12:00:00")))
+
+    assert len(batch) == 2
+    assert all(not math.isnan(v) for v in batch.high)
+
+
+def test_parse_keeps_missing_volume_as_nan():
+    batch = parse_candles_page(page(row("2024-03-01 10:00:00", volume=None)))
+
+    assert len(batch) == 1
+    assert math.isnan(batch.volume[0])
+
+
+def test_parse_empty_response():
+    assert len(parse_candles_page(b"{}")) == 0
+    assert len(parse_candles_page(page())) == 0
+
+
+def test_batch_slice_and_extend():
+    batch = parse_candles_page(page(*(row(f"2024-03-01 {h:02d}:00:00", price=h) for h in range(10, 15))))
+
+    head, tail = batch.slice(0, 2), batch.slice(2, len(batch))
+    merged = CandleBatch()
+    merged.extend(head)
+    merged.extend(tail)
+
+    assert len(head) == 2 and len(tail) == 3
+    assert list(merged.timestamps) == list(batch.timestamps)
+    assert list(merged.open) == list(batch.open)
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime
+
+from src.core.http_client import HttpClientRegistry
+from src.modules.notify.delivery import DeliveryReport, PushDelivery, PushItem
+from src.modules.notify.onesignal import OneSignalClient
+
+
+NOW = datetime(2024, 5, 6, 12)
+
+
+def item(alert_id: int, player_id: str, subscription_id: str | None = None, text: str = "SBER 300₽") -> PushItem:
+    return PushItem(alert_id=alert_id, player_id=player_id, text=text, date=NOW, subscription_id=subscription_id)
+
+
+def deliver(fake_onesignal, items: list[PushItem], batch_size: int = 20000) -> DeliveryReport:
+    async def run():
+        http = HttpClientRegistry()
+        try:
+            client = OneSignalClient(base_url=fake_onesignal.url, app_id="test-app", api_key="test-key", http=http)
+            return await PushDelivery(client, workers=4, batch_size=batch_size).deliver(items)
+        finally:
+            await http.aclose()
+
+    return asyncio.run(run())
+
+
+def delivered_ids(report: DeliveryReport) -> set[int]:
+    return {alert_id for alert_id, _ in report.delivered}
+
+
+def test_same_text_goes_out_as_one_notification(fake_onesignal):
+    report = deliver(fake_onesignal, [item(1, "p1", "s1"), item(2, "p2", "s2"), item(3, "p3", "s3", text="GAZP 150₽")])
+
+    assert delivered_ids(report) == {1, 2, 3}
+    assert fake_onesignal.lookups == []
+    sent = sorted(sorted(n["include_subscription_ids"]) for n in fake_onesignal.notifications)
+    assert sent == [["s1", "s2"], ["s3"]]
+    assert all(n["app_id"] == "test-app" for n in fake_onesignal.notifications)
+
+
+def test_batches_respect_batch_size(fake_onesignal):
+    report = deliver(fake_onesignal, [item(i, f"p{i}", f"s{i}") for i in range(5)], batch_size=2)
+
+    assert delivered_ids(report) == set(range(5))
+    assert report.notifications == 3
+
+
+def test_missing_subscription_is_looked_up_once_per_player(fake_onesignal):
+    fake_onesignal.subscriptions = {
+        "p1": [{"id": "old", "enabled": False}, {"id": "s1", "enabled": True}],
+        "p2": [{"id": "off", "enabled": False}],
+    }
+
+    report = deliver(fake_onesignal, [item(1, "p1"), item(2, "p1", text="GAZP 150₽"), item(3, "p2"), item(4, "p3")])
+
+    assert sorted(fake_onesignal.lookups) == ["p1", "p2", "p3"]
+    assert delivered_ids(report) == {1, 2}
+    assert report.no_subscription == 2
+    assert report.resolved == {"p1": "s1", "p2": None, "p3": None}
+
+
+def test_rejected_stored_subscription_is_resolved_and_resent(fake_onesignal):
+    fake_onesignal.rejected = {"stale"}
+    fake_onesignal.subscriptions = {"p1": [{"id": "fresh", "enabled": True}]}
+
+    report = deliver(fake_onesignal, [item(1, "p1", "stale"), item(2, "p2", "s2")])
+
+    assert delivered_ids(report) == {1, 2}
+    assert fake_onesignal.lookups == ["p1"]
+    assert report.resolved == {"p1": "fresh"}
+    assert fake_onesignal.notifications[-1]["include_subscription_ids"] == ["fresh"]
+    assert report.failed == 0
+
+
+def test_onesignal_error_delivers_nothing(fake_onesignal):
+    fake_onesignal.send_status = 500
+
+    report = deliver(fake_onesignal, [item(1, "p1", "s1"), item(2, "p2", "s2")])
+
+    assert report.delivered == []
+    assert report.failed == 2
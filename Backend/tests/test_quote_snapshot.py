@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.core.events import PriceEventBus
+from src.core.http_client import HttpClientRegistry
+from src.modules.stock_prices import snapshot
+from src.modules.stock_prices.snapshot import QuoteSnapshotIngest
+
+
+STOCKS = {"AFLT": 1, "GAZP": 2, "SBER": 3, "VTBR": 4, "YNDX": 5, "MOEX": 6}
+
+
+class FakeSession:
+    commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        self.commits += 1
+
+
+class FakeStockRepository:
+    def __init__(self, session):
+        pass
+
+    async def get_all_by(self, board: str):
+        return [SimpleNamespace(id=stock_id, symbol=symbol) for symbol, stock_id in STOCKS.items()]
+
+
+class FakeQuoteRepository:
+    written: list[dict] = []
+    known: dict[int, datetime] = {}
+
+    def __init__(self, session):
+        pass
+
+    async def upsert_many(self, quotes: list[dict]) -> list:
+        # Как ON CONFLICT ... WHERE quoted_at < excluded.quoted_at: тот же снимок не обновляет строку
+        FakeQuoteRepository.written = quotes
+        updated = []
+        for q in quotes:
+            if self.known.get(q["stock_id"], datetime.min) < q["quoted_at"]:
+                self.known[q["stock_id"]] = q["quoted_at"]
+                updated.append((q["stock_id"], q["last"], q["quoted_at"]))
+        return updated
+
+
+def run_ingest(fake_iss, monkeypatch) -> tuple[int, PriceEventBus, list]:
+    bus = PriceEventBus()
+    session = FakeSession()
+    monkeypatch.setattr(snapshot, "StockRepository", FakeStockRepository)
+    monkeypatch.setattr(snapshot, "LatestQuoteRepository", FakeQuoteRepository)
+    monkeypatch.setattr(snapshot, "price_events", bus)
+
+    async def run():
+        http = HttpClientRegistry()
+        try:
+            ingest = QuoteSnapshotIngest("TQBR", base_url=f"{fake_iss.url}/iss", session_maker=lambda: session, http=http)
+            return await ingest.run()
+        finally:
+            await http.aclose()
+
+    return asyncio.run(run()), bus, fake_iss.requests
+
+
+def test_snapshot_is_one_request_for_the_board(fake_iss, monkeypatch):
+    FakeQuoteRepository.known = {}
+    updated, bus, requests = run_ingest(fake_iss, monkeypatch)
+
+    assert len(requests) == 1
+    method, path, query, _ = requests[0]
+    assert path == "/iss/engines/stock/markets/shares/boards/TQBR/securities.json"
+    assert query["iss.only"] == "marketdata"
+    assert updated == 4
+
+
+def test_snapshot_builds_quotes(fake_iss, monkeypatch):
+    FakeQuoteRepository.known = {}
+    run_ingest(fake_iss, monkeypatch)
+    quotes = {q["stock_id"]: q for q in FakeQuoteRepository.written}
+
+    # LKOH нет в каталоге, у YNDX нет цены, у MOEX нет времени снимка
+    assert set(quotes) == {1, 2, 3, 4}
+    assert quotes[3]["last"] == 285.67
+    assert quotes[3]["quoted_at"] == datetime(2024, 3, 1, 15, 42, 18)
+    # Без LAST берётся LCURRENTPRICE
+    assert quotes[4]["last"] == 0.02513
+
+
+def test_snapshot_publishes_only_advanced_quotes(fake_iss, monkeypatch):
+    FakeQuoteRepository.known = {}
+    _, bus, _ = run_ingest(fake_iss, monkeypatch)
+    assert bus.published == 4
+
+    # Повтор того же снимка ничего не обновляет и не публикует
+    updated, bus, _ = run_ingest(fake_iss, monkeypatch)
+    assert updated == 0
+    assert bus.published == 0
+
+    fake_iss.marketdata["marketdata"]["data"][3][-1] = "2024-03-01 15:47:18"
+    updated, bus, _ = run_ingest(fake_iss, monkeypatch)
+    event = bus.get_nowait()
+    assert updated == 1
+    assert (event.stock_id, event.close) == (3, 285.67)
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from src.core.rate_limiter import RateLimiter
+
+
+async def acquire_many(limiter: RateLimiter, count: int) -> float:
+    started = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(count)))
+    return time.monotonic() - started
+
+
+def test_burst_is_not_delayed():
+    limiter = RateLimiter(rate=10, burst=5)
+
+    assert asyncio.run(acquire_many(limiter, 5)) < 0.05
+
+
+def test_rate_is_bounded_after_burst():
+    limiter = RateLimiter(rate=100, burst=5)
+
+    # Сверх запаса 20 запросов при 100 rps — не быстрее 0.2s
+    elapsed = asyncio.run(acquire_many(limiter, 25))
+
+    assert elapsed >= 0.19
+
+
+def test_context_manager_acquires():
+    async def run():
+        limiter = RateLimiter(rate=1000, burst=1)
+        async with limiter:
+            pass
+        return limiter._tokens
+
+    assert asyncio.run(run()) < 1